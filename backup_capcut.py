@@ -2,43 +2,109 @@
 import os
 import subprocess
 import argparse
+import functools
 import shlex
-import fnmatch
+import shutil
+import socket
+import tarfile
+import tempfile
+import glob
 import json
+import mmap
+import re
 import hashlib
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Optional, Dict
+from types import MappingProxyType
+from typing import Any, Iterator, List, Mapping, Optional, Dict, Set, Tuple, Deque, Sequence
 
 from dotenv import load_dotenv
 
 
 # ----------------- PATH HELPERS ----------------- #
 
+_WSL_RE = re.compile(r"^/mnt/([a-zA-Z])(?:/(.*))?$")
+
+
+@functools.lru_cache(maxsize=4096)
 def wsl_to_win_path(wsl_path: str) -> str:
     """
     Convert a WSL path like /mnt/c/Users/rtackett/Documents/CapCutBackups
     to a Windows path like C:\\Users\\rtackett\\Documents\\CapCutBackups.
     """
-    wsl_path = os.path.normpath(wsl_path)
-    if not wsl_path.startswith("/mnt/"):
+    m = _WSL_RE.match(wsl_path.rstrip("/"))
+    if not m:
         raise ValueError(f"Cannot convert non-/mnt path to Windows path: {wsl_path}")
+    return f"{m.group(1).upper()}:\\" + (m.group(2) or "").replace("/", "\\")
+
+# adb binaries that run inside WSL (ADB_PATH_LINUX); filled by load_config()
+_NATIVE_ADB_PATHS: Set[str] = set()
+
+
+def adb_local_path(adb_path: str, local_path: str) -> str:
+    """
+    Path to hand adb for a local file or dir. adb.exe (Windows adb run from
+    WSL) needs the Windows form (see wsl_to_win_path); a Linux adb
+    (ADB_PATH_LINUX) reads the WSL path as-is, with no conversion and no
+    /mnt/c 9p hop.
+    """
+    if adb_path in _NATIVE_ADB_PATHS:
+        return local_path
+    return wsl_to_win_path(local_path)
+
+
+# Steps, pulls and devices print from thread pools; print() writes the text
+# and the newline separately, so concurrent lines go through log() to stay
+# whole, each prefixed with log_tag() so it can be told apart.
+_PRINT_LOCK = threading.Lock()
 
-    parts = wsl_path.split("/")
-    # ['', 'mnt', 'c', 'Users', 'rtackett', 'Documents', 'CapCutBackups', ...]
-    if len(parts) < 4:
-        raise ValueError(f"Unexpected WSL path format: {wsl_path}")
+# Serials backed up side by side with other devices (see main()). Every adb
+# call targets its serial, but only these show it in log lines and
+# generated script names; a lone device keeps the plain ones.
+_MULTI_DEVICE_SERIALS: Set[str] = set()
 
-    drive_letter = parts[2].upper()  # 'c' -> 'C'
-    rest = parts[3:]                 # ['Users','rtackett',...]
-    return drive_letter + ":\\" + "\\".join(rest)
+
+def device_label(serial: Optional[str]) -> Optional[str]:
+    """serial if it is one of several devices being backed up, else None."""
+    return serial if serial in _MULTI_DEVICE_SERIALS else None
+
+
+def log_tag(step: Optional[str] = None, serial: Optional[str] = None) -> str:
+    """
+    Line prefix for one backup step, e.g. "[media]", or "[media SER123]"
+    when several devices are backed up at once (see device_label).
+    """
+    parts = [part for part in (step, device_label(serial)) if part]
+    return f"[{' '.join(parts)}]" if parts else ""
+
+
+def log(msg: str, tag: str = "") -> None:
+    """Print msg as one locked write, with `tag` in front of every line."""
+    if tag:
+        msg = "\n".join(f"{tag} {line}" for line in msg.split("\n"))
+    with _PRINT_LOCK:
+        print(msg, flush=True)
 
 
 # ----------------- ENV LOADING ----------------- #
 
-def load_config():
+@functools.lru_cache(maxsize=1)
+def load_config() -> Mapping[str, Any]:
+    """
+    Read .env once per process. The result is cached and read-only (lists
+    are tuples), so threads and repeat callers can share it safely.
+    """
     load_dotenv()
 
-    adb_path = os.getenv("ADB_PATH_WSL")
+    # A Linux adb, when configured, wins over adb.exe (see adb_local_path)
+    adb_path_linux = os.getenv("ADB_PATH_LINUX", "").strip()
+    if adb_path_linux:
+        _NATIVE_ADB_PATHS.add(adb_path_linux)
+    adb_path = adb_path_linux or os.getenv("ADB_PATH_WSL")
     backup_root = os.getenv("BACKUP_ROOT_WSL")
 
     phone_capcut_dir = os.getenv(
@@ -47,420 +113,1493 @@ def load_config():
     )
 
     media_dirs_raw = os.getenv("PHONE_MEDIA_DIRS", "")
-    media_dirs = [m.strip() for m in media_dirs_raw.split(",") if m.strip()]
+    # Normalized once here (no trailing "/", no empty entries), so
+    # everything downstream can take the paths as-is
+    media_dirs = tuple(
+        d for d in (m.strip().rstrip("/") for m in media_dirs_raw.split(",")) if d
+    )
 
     portodb_dir_raw = os.getenv("PORTODB_DB_DIR", "").strip()
     portodb_dir: Optional[str] = portodb_dir_raw or None
 
     download_ignore_raw = os.getenv("DOWNLOAD_IGNORE_PATTERNS", "")
-    download_ignore_patterns = [
+    download_ignore_patterns = tuple(
         p.strip() for p in download_ignore_raw.split(",") if p.strip()
-    ]
+    )
+
+    parallelism_raw = os.getenv("BACKUP_PARALLELISM", "4").strip()
+    download_parallelism_raw = os.getenv("DOWNLOAD_PARALLELISM", "8").strip()
+    incremental = os.getenv("INCREMENTAL_BACKUP", "").strip().lower() in ("1", "true", "yes")
+    use_tar_stream = os.getenv("USE_TAR_STREAM", "").strip().lower() in ("1", "true", "yes")
+    use_adb_forward = os.getenv("USE_ADB_FORWARD", "").strip().lower() in ("1", "true", "yes")
 
     if not adb_path:
-        raise SystemExit("[ERROR] ADB_PATH_WSL not set in .env")
+        raise SystemExit("[ERROR] ADB_PATH_WSL (or ADB_PATH_LINUX) not set in .env")
     if not backup_root:
         raise SystemExit("[ERROR] BACKUP_ROOT_WSL not set in .env")
+    try:
+        parallelism = max(1, int(parallelism_raw))
+    except ValueError:
+        raise SystemExit(f"[ERROR] BACKUP_PARALLELISM must be an integer, got {parallelism_raw!r}")
+    try:
+        download_parallelism = max(1, int(download_parallelism_raw))
+    except ValueError:
+        raise SystemExit(
+            f"[ERROR] DOWNLOAD_PARALLELISM must be an integer, got {download_parallelism_raw!r}"
+        )
 
-    return {
+    return MappingProxyType({
         "ADB_PATH": adb_path,
         "BACKUP_ROOT": backup_root,
         "PHONE_CAPCUT_DIR": phone_capcut_dir.rstrip("/"),
         "PHONE_MEDIA_DIRS": media_dirs,
         "PORTODB_DB_DIR": portodb_dir,
         "DOWNLOAD_IGNORE_PATTERNS": download_ignore_patterns,
-    }
+        "BACKUP_PARALLELISM": parallelism,
+        "DOWNLOAD_PARALLELISM": download_parallelism,
+        "INCREMENTAL_BACKUP": incremental,
+        "USE_TAR_STREAM": use_tar_stream,
+        "USE_ADB_FORWARD": use_adb_forward,
+    })
 
 
 # ----------------- ADB HELPERS ----------------- #
 
-def run_adb(adb_path: str, args: List[str], check: bool = False) -> subprocess.CompletedProcess:
-    cmd = [adb_path] + args
+# Older adbd builds reject `adb shell <cmd>` much past this length; longer
+# commands are fed to a device-side `sh` over stdin instead.
+ADB_SHELL_MAX_CMD = 1024
+
+# Most files handed to one multi-file `adb pull a b c <dest>`; keeps the
+# adb.exe command line well under Windows' 32K-character limit.
+PULL_CHUNK_FILES = 200
+
+# First device-side TCP port for USE_ADB_FORWARD; parallel dirs count up
+# from it. The host side lets adb pick a free port.
+ADB_FORWARD_PORT_BASE = 28500
+
+
+def adb_cmd(adb_path: str, serial: Optional[str] = None) -> List[str]:
+    """adb argv prefix, targeting `serial` when several devices are attached."""
+    return [adb_path, "-s", serial] if serial else [adb_path]
+
+
+def run_adb(
+    adb_path: str,
+    args: List[str],
+    check: bool = False,
+    input_text: Optional[str] = None,
+    serial: Optional[str] = None
+) -> subprocess.CompletedProcess:
+    cmd = adb_cmd(adb_path, serial) + args
+    # Without input, give adb.exe no stdin at all rather than the terminal
+    stdin = subprocess.DEVNULL if input_text is None else None
     try:
-        return subprocess.run(cmd, capture_output=True, text=True, check=check)
+        return subprocess.run(
+            cmd, capture_output=True, text=True, check=check, input=input_text, stdin=stdin
+        )
     except FileNotFoundError:
         raise SystemExit(
             f"[ERROR] adb executable not found at {adb_path}\n"
-            "Check ADB_PATH_WSL in your .env and verify the path in WSL matches where adb.exe lives on Windows."
+            "Check ADB_PATH_WSL (or ADB_PATH_LINUX) in your .env and verify the path in WSL matches where adb.exe lives on Windows."
         )
 
 
-def adb_shell(adb_path: str, cmd: str) -> str:
-    result = run_adb(adb_path, ["shell", cmd])
+def run_adb_stream(
+    adb_path: str,
+    args: List[str],
+    serial: Optional[str] = None,
+    tag: str = ""
+) -> subprocess.CompletedProcess:
+    """
+    Like run_adb(), for long transfers (pull/push): adb's stdout (progress
+    and per-file summaries) is echoed line by line as it arrives instead of
+    being buffered whole in memory. stderr goes to a temp file, so it can't
+    fill a pipe mid-transfer, and comes back as .stderr for the caller's
+    [WARN] message; .stdout is empty. Echoed lines carry `tag` (log_tag()).
+    """
+    cmd = adb_cmd(adb_path, serial) + args
+    with tempfile.TemporaryFile() as err:
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=err,
+                text=True,
+                errors="replace",
+                bufsize=1,
+            )
+        except FileNotFoundError:
+            raise SystemExit(
+                f"[ERROR] adb executable not found at {adb_path}\n"
+                "Check ADB_PATH_WSL (or ADB_PATH_LINUX) in your .env and verify the path in WSL matches where adb.exe lives on Windows."
+            )
+        with proc.stdout:
+            for line in proc.stdout:
+                if line.strip():
+                    log(f"    {line.rstrip()}", tag)
+        returncode = proc.wait()
+        err.seek(0)
+        stderr = err.read().decode("utf-8", "replace")
+    return subprocess.CompletedProcess(cmd, returncode, "", stderr)
+
+
+class AdbSession:
+    """
+    Keep one `adb shell` process open and feed it commands over stdin, so
+    repeated adb_shell() calls don't each pay for spawning adb.exe and
+    re-attaching to the device.
+
+    While the context is open, adb_shell() for the same adb_path and serial
+    is routed through this session. Each command is followed by an `echo` of a
+    sentinel plus the exit status; stdout is read up to that sentinel.
+    The shell's stderr is inherited, so device-side errors go straight to
+    the terminal instead of being tagged [ADB STDERR].
+
+    The pipes are binary; output is decoded per line (see _decode_line).
+    """
+
+    SENTINEL = b"__CAPCUT_BACKUP_END__"
+
+    def __init__(self, adb_path: str, serial: Optional[str] = None):
+        self.adb_path = adb_path
+        self.serial = serial
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "AdbSession":
+        # Make sure the server is up once, so every later pull/shell attaches
+        # to the same long-lived server instead of racing to start it.
+        run_adb(self.adb_path, ["start-server"])
+        self._proc = subprocess.Popen(
+            adb_cmd(self.adb_path, self.serial) + ["shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        _SHELL_SESSIONS[(self.adb_path, self.serial)] = self
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _SHELL_SESSIONS.pop((self.adb_path, self.serial), None)
+        self._close()
+
+    def _close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None
+
+    def _send(self, cmd: str) -> bool:
+        # Caller holds self._lock
+        proc = self._proc
+        if proc is None:
+            return False
+        try:
+            proc.stdin.write(cmd.encode("utf-8", "surrogateescape") + b"\necho " + self.SENTINEL + b"$?\n")
+            proc.stdin.flush()
+            return True
+        except OSError:
+            log("[WARN] adb shell session closed; falling back to one-off adb calls.", log_tag(serial=self.serial))
+            self._close()
+            return False
+
+    def _read_output(self) -> Iterator[bytes]:
+        """
+        Yield raw stdout lines of the command just sent, up to the sentinel.
+        The exit status lands in self._status (None if the session died).
+        Caller holds self._lock.
+        """
+        self._status: Optional[int] = None
+        while self._proc is not None:
+            line = self._proc.stdout.readline()
+            if not line:
+                log("[WARN] adb shell session closed; falling back to one-off adb calls.", log_tag(serial=self.serial))
+                self._close()
+                return
+
+            # Output without a trailing newline shares a line with the sentinel
+            idx = line.find(self.SENTINEL)
+            if idx < 0:
+                yield line
+                continue
+            if idx:
+                yield line[:idx]
+            status = line[idx + len(self.SENTINEL):].strip()
+            self._status = int(status) if status.isdigit() else 1
+            return
+
+    def run(self, cmd: str) -> Optional[Tuple[str, int]]:
+        """
+        Run one shell command; returns (stdout, exit_status), or None if the
+        session has died (e.g. the phone was unplugged).
+        """
+        with self._lock:
+            if not self._send(cmd):
+                return None
+            out = b"".join(self._read_output())
+            if self._status is None:
+                return None
+            return out.decode("utf-8", "surrogateescape"), self._status
+
+    def iter_lines(self, cmd: str) -> Iterator[str]:
+        """
+        Yield the non-empty stdout lines of one shell command as they arrive.
+        The session stays locked until the generator is exhausted or closed.
+        """
+        with self._lock:
+            if not self._send(cmd):
+                return
+            output = self._read_output()
+            try:
+                for raw in output:
+                    line = _decode_line(raw)
+                    if line is not None:
+                        yield line
+            finally:
+                # Drain to the sentinel so the next command's framing holds
+                for _ in output:
+                    pass
+
+
+def _decode_line(raw: bytes) -> Optional[str]:
+    """
+    Turn one raw line of shell output into a str, or None if it's blank.
+    Blank lines are dropped before decoding, and surrogateescape keeps
+    non-UTF-8 filenames intact (they round-trip back into adb arguments).
+    """
+    raw = raw.rstrip(b"\r\n")
+    if not raw.strip():
+        return None
+    return raw.decode("utf-8", "surrogateescape")
+
+
+# (adb_path, serial) -> open AdbSession (see AdbSession.__enter__)
+_SHELL_SESSIONS: Dict[Tuple[str, Optional[str]], AdbSession] = {}
+
+
+def adb_shell(adb_path: str, cmd: str, serial: Optional[str] = None) -> str:
+    session = _SHELL_SESSIONS.get((adb_path, serial))
+    if session is not None:
+        ran = session.run(cmd)
+        if ran is not None:
+            return ran[0]
+
+    if len(cmd) > ADB_SHELL_MAX_CMD:
+        result = run_adb(adb_path, ["shell", "sh"], input_text=cmd + "\n", serial=serial)
+    else:
+        result = run_adb(adb_path, ["shell", cmd], serial=serial)
     if result.stderr.strip():
-        print("[ADB STDERR]", result.stderr.strip())
+        log(f"[ADB STDERR] {result.stderr.strip()}", log_tag(serial=serial))
     return result.stdout
 
 
+def adb_shell_iter(adb_path: str, cmd: str, serial: Optional[str] = None) -> Iterator[str]:
+    """
+    Like adb_shell(), but yield non-empty stdout lines as they arrive instead
+    of buffering the whole output, so long `find` listings stay O(1) in memory
+    and callers can start on the first path before the walk finishes.
+    """
+    session = _SHELL_SESSIONS.get((adb_path, serial))
+    if session is not None and session.alive:
+        yield from session.iter_lines(cmd)
+        return
+
+    # stderr goes to a temp file, so a chatty command can't fill the pipe
+    # and block while we're still reading stdout
+    with tempfile.TemporaryFile() as err:
+        try:
+            proc = subprocess.Popen(
+                adb_cmd(adb_path, serial) + ["shell", cmd],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=err,
+            )
+        except FileNotFoundError:
+            raise SystemExit(
+                f"[ERROR] adb executable not found at {adb_path}\n"
+                "Check ADB_PATH_WSL (or ADB_PATH_LINUX) in your .env and verify the path in WSL matches where adb.exe lives on Windows."
+            )
+        try:
+            for raw in proc.stdout:
+                line = _decode_line(raw)
+                if line is not None:
+                    yield line
+        finally:
+            proc.stdout.close()
+            proc.wait()
+            err.seek(0)
+            stderr = err.read().decode("utf-8", "replace").strip()
+            if stderr:
+                log(f"[ADB STDERR] {stderr}", log_tag(serial=serial))
+
+
+def list_authorized_devices(adb_path: str) -> List[str]:
+    """
+    Parse `adb devices` and return the serials whose state is "device",
+    skipping unauthorized/offline entries and any daemon startup chatter.
+    """
+    devices = run_adb(adb_path, ["devices"]).stdout
+    log(devices.strip())
+    authorized: List[str] = []
+    for line in devices.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) >= 2 and fields[1] == "device":
+            authorized.append(fields[0])
+    return authorized
+
+
 # ----------------- BACKUP HELPERS ----------------- #
 
-def create_run_directory(backup_root: str) -> str:
-    now = datetime.now()
-    yyyy = f"{now.year:04d}"
-    mm = f"{now.month:02d}"
-    dd = f"{now.day:02d}"
-    run_ts = now.strftime("%H%M")
+def device_dir_name(serial: str) -> str:
+    """Serial as a file/dir name (network serials look like 10.0.0.5:5555)."""
+    return re.sub(r"[^\w.-]", "_", serial)
 
-    run_dir = os.path.join(backup_root, yyyy, mm, dd, run_ts)
+
+def create_run_directory(backup_root: str, run_start: datetime, tag: str = "") -> str:
+    # <backup_root>/YYYY/MM/DD/HHMM in one strftime
+    run_dir = os.path.join(backup_root, run_start.strftime(os.path.join("%Y", "%m", "%d", "%H%M")))
     os.makedirs(run_dir, exist_ok=True)
-    print(f"[RUN] Backup root for this run: {run_dir}")
+    log(f"[RUN] Backup root for this run: {run_dir}", tag)
     return run_dir
 
 
-def backup_capcut_data(adb_path: str, phone_capcut_dir: str, run_dir: str) -> None:
+def prepare_run_layout(run_dir: str, subdirs: List[str], adb_path: str) -> Dict[str, Tuple[str, str]]:
     """
-    Pull /sdcard/Android/data/com.lemon.lvoverseas into:
-      <run_dir>/capcut_app/com.lemon.lvoverseas/...
+    Create each <run_dir>/<subdir> destination in one pass, before any worker
+    threads start, and convert it once to the path adb needs (Windows form
+    for adb.exe; see adb_local_path). Returns subdir -> (wsl_path, win_path).
+
+    Exits before any adb work if the run dir can't be expressed as a
+    Windows path.
     """
-    if not phone_capcut_dir:
-        print("[INFO] PHONE_CAPCUT_DIR not set; skipping CapCut app data backup.")
-        return
+    layout: Dict[str, Tuple[str, str]] = {}
+    for sub in subdirs:
+        wsl_path = os.path.join(run_dir, sub)
+        try:
+            win_path = adb_local_path(adb_path, wsl_path)
+        except ValueError as e:
+            raise SystemExit(f"[PATH CONVERT FAIL] {e}")
+        os.makedirs(wsl_path, exist_ok=True)
+        layout[sub] = (wsl_path, win_path)
+    return layout
+
+
+def find_previous_run_dir(backup_root: str, run_dir: str) -> Optional[str]:
+    """
+    Return the most recent run dir (<backup_root>/YYYY/MM/DD/HHMM) older
+    than run_dir, or None if this is the first run.
+    """
+    pattern = os.path.join(
+        backup_root, "[0-9]" * 4, "[0-9]" * 2, "[0-9]" * 2, "[0-9]" * 4
+    )
+    current = os.path.normpath(run_dir)
+    # Zero-padded names sort chronologically
+    earlier = [d for d in sorted(glob.glob(pattern)) if os.path.normpath(d) < current]
+    return earlier[-1] if earlier else None
+
+
+# ----------------- MANIFEST HELPERS ----------------- #
 
-    capcut_parent_wsl = os.path.join(run_dir, "capcut_app")
-    os.makedirs(capcut_parent_wsl, exist_ok=True)
+def manifest_path(run_dir: str, name: str) -> str:
+    return os.path.join(run_dir, f"manifest-{name}.json")
 
+
+def load_manifest(prev_run_dir: Optional[str], name: str, tag: str = "") -> Dict[str, List[int]]:
+    """
+    Load <prev_run_dir>/manifest-<name>.json as path -> [size, mtime].
+    Missing or unreadable manifests mean "pull everything".
+    """
+    if not prev_run_dir:
+        return {}
+    path = manifest_path(prev_run_dir, name)
+    if not os.path.exists(path):
+        return {}
     try:
-        capcut_parent_win = wsl_to_win_path(capcut_parent_wsl)
-    except ValueError as e:
-        print(f"[PATH CONVERT FAIL] {e}")
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return {str(k): list(v) for k, v in data.items()}
+        return {}
+    except Exception as e:
+        log(f"[WARN] Could not read manifest {path}: {e}", tag)
+        return {}
+
+
+def save_manifest(run_dir: str, name: str, manifest: Dict[str, List[int]]) -> None:
+    path = manifest_path(run_dir, name)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def list_media_files_with_stat(
+    adb_path: str,
+    phone_dir: str,
+    serial: Optional[str] = None,
+    ignore_patterns: Sequence[str] = ()
+) -> Dict[str, List[int]]:
+    """
+    List files under phone_dir as path -> [size, mtime] with a single
+    `find ... -exec stat` on the device, parsed as the lines stream in.
+    Files matching ignore_patterns are left out by `find` itself.
+    """
+    manifest: Dict[str, List[int]] = {}
+    for line in adb_shell_iter(
+        adb_path,
+        f"find {shlex.quote(phone_dir)} -type f{find_name_filter(ignore_patterns)}"
+        f" -exec stat -c '%s %Y %n' {{}} + 2>/dev/null",
+        serial,
+    ):
+        # "<size> <mtime> <path>"; the path itself may contain spaces
+        parts = line.split(" ", 2)
+        if len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit():
+            manifest[parts[2]] = [int(parts[0]), int(parts[1])]
+    return manifest
+
+
+def chunk_pulls_by_dir(
+    phone_dir: str,
+    paths: List[str],
+    chunk_size: int = PULL_CHUNK_FILES
+) -> List[Tuple[str, List[str]]]:
+    """
+    Group phone paths by their directory relative to phone_dir and split each
+    group into chunks, so one `adb pull a b c <dest>` keeps the subdir layout.
+    Returns a list of (rel_dir, paths).
+    """
+    by_dir: Dict[str, List[str]] = {}
+    for p in paths:
+        rel = p[len(phone_dir) + 1:] if p.startswith(phone_dir + "/") else os.path.basename(p)
+        by_dir.setdefault(os.path.dirname(rel), []).append(p)
+
+    chunks: List[Tuple[str, List[str]]] = []
+    for rel_dir, group in sorted(by_dir.items()):
+        for i in range(0, len(group), chunk_size):
+            chunks.append((rel_dir, group[i:i + chunk_size]))
+    return chunks
+
+
+def link_unchanged_files(
+    phone_dir: str,
+    paths: List[str],
+    prev_dest_wsl: str,
+    dest_wsl: str,
+    tag: str = ""
+) -> List[str]:
+    """
+    Hardlink each unchanged phone path's copy from the previous run
+    (prev_dest_wsl/<rel>) into this run (dest_wsl/<rel>), like rsync
+    --link-dest, so every run dir stays a complete snapshot without
+    rewriting the bytes. Falls back to a copy when linking isn't possible
+    (e.g. across filesystems).
+
+    Returns the paths with no usable previous copy; those need pulling.
+    """
+    missing: List[str] = []
+    linked = 0
+    for p in paths:
+        rel = p[len(phone_dir) + 1:] if p.startswith(phone_dir + "/") else os.path.basename(p)
+        src = os.path.join(prev_dest_wsl, rel)
+        dst = os.path.join(dest_wsl, rel)
+        if not os.path.isfile(src):
+            missing.append(p)
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            pass
+        except OSError:
+            try:
+                shutil.copy2(src, dst)
+            except OSError as e:
+                log(f"[WARN] Could not reuse {src}: {e}", tag)
+                missing.append(p)
+                continue
+        linked += 1
+    log(f"[INCREMENTAL] Reused {linked} unchanged files from the previous run.", tag)
+    return missing
+
+
+# ----------------- BACKUP STEPS ----------------- #
+
+def backup_capcut_data(
+    adb_path: str,
+    phone_capcut_dir: str,
+    capcut_parent_wsl: str,
+    capcut_parent_win: str,
+    serial: Optional[str] = None
+) -> None:
+    """
+    Pull /sdcard/Android/data/com.lemon.lvoverseas into:
+      <run_dir>/capcut_app/com.lemon.lvoverseas/...
+
+    capcut_parent_wsl/_win come from prepare_run_layout().
+    """
+    tag = log_tag("capcut", serial)
+    if not phone_capcut_dir:
+        log("[INFO] PHONE_CAPCUT_DIR not set; skipping CapCut app data backup.", tag)
         return
 
-    print(f"[STEP] Backing up CapCut app data from {phone_capcut_dir} ...")
-    result = run_adb(adb_path, ["pull", phone_capcut_dir, capcut_parent_win])
+    log(f"[STEP] Backing up CapCut app data from {phone_capcut_dir} ...", tag)
+    result = run_adb_stream(adb_path, ["pull", phone_capcut_dir, capcut_parent_win], serial=serial, tag=tag)
     if result.returncode != 0:
-        print("[WARN] CapCut data backup may have failed:")
-        print(result.stderr.strip())
+        log(f"[WARN] CapCut data backup may have failed:\n{result.stderr.strip()}", tag)
     else:
-        print("[OK] CapCut data backed up to", capcut_parent_wsl)
+        log(f"[OK] CapCut data backed up to {capcut_parent_wsl}", tag)
 
 
-def should_ignore_download_file(path: str, ignore_patterns: List[str]) -> bool:
+@functools.lru_cache(maxsize=None)
+def device_has_tar(adb_path: str, serial: Optional[str] = None) -> bool:
     """
-    Returns True if the basename of 'path' matches any ignore pattern.
+    True if the device shell has a `tar` (toybox ships one on modern
+    Android). Checked once per device.
     """
-    filename = os.path.basename(path)
-    for pat in ignore_patterns:
-        if fnmatch.fnmatch(filename, pat):
-            return True
-    return False
+    return bool(adb_shell(adb_path, "command -v tar 2>/dev/null", serial).strip())
 
 
-def backup_media_dirs(
+def fast_pull_dir(
     adb_path: str,
-    media_dirs: List[str],
-    run_dir: str,
-    download_ignore_patterns: List[str]
-) -> None:
+    phone_dir: str,
+    dest_local: str,
+    extracted: Optional[List[str]] = None,
+    serial: Optional[str] = None
+) -> subprocess.CompletedProcess:
     """
-    For each media dir (e.g. /sdcard/DCIM/Camera, /sdcard/Pictures, /sdcard/Download),
-    back up contents into:
-        <run_dir>/media/<Name>/...
+    Pull phone_dir's contents into dest_local as one tar stream over
+    `adb exec-out`, instead of adb pull's per-file sync handshake. Files are
+    extracted in WSL, so dest_local is a plain local path (no Windows form).
+    The phone path of every file extracted is appended to `extracted`, so
+    callers don't need a separate `find` to know what was backed up.
+
+    Returns a CompletedProcess like run_adb(), so callers treat both alike.
+    Falls back to `adb pull` when the device has no tar.
+    """
+    if not device_has_tar(adb_path, serial):
+        tag = log_tag("media", serial)
+        log(f"[INFO] No tar on device; using adb pull for {phone_dir}.", tag)
+        return run_adb_stream(
+            adb_path, ["pull", phone_dir, adb_local_path(adb_path, os.path.dirname(dest_local))], serial=serial, tag=tag
+        )
 
-    - Camera/Pictures/Movies/etc. use bulk adb pull.
-    - Download is treated specially: we honor DOWNLOAD_IGNORE_PATTERNS
-      and skip matching files.
+    # exec-out is a raw stream, so device-side stderr must not reach stdout
+    cmd = adb_cmd(adb_path, serial) + ["exec-out", f"tar -cf - -C {shlex.quote(phone_dir)} . 2>/dev/null"]
+    os.makedirs(dest_local, exist_ok=True)
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+    error = ""
+    try:
+        names = extract_tar_stream(proc.stdout, dest_local)
+        if extracted is not None:
+            extracted.extend(phone_dir + "/" + name for name in names)
+    except (tarfile.TarError, OSError) as e:
+        error = f"tar stream from {phone_dir} failed: {e}"
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+
+    if error and not returncode:
+        returncode = 1
+    return subprocess.CompletedProcess(cmd, returncode, "", error)
+
+
+def extract_tar_stream(fileobj, dest_local: str) -> List[str]:
+    """
+    Extract a streamed (non-seekable) tar into dest_local and return the
+    normalized relative names of the regular files in it.
     """
-    media_parent_wsl = os.path.join(run_dir, "media")
-    os.makedirs(media_parent_wsl, exist_ok=True)
+    names: List[str] = []
+
+    def members(tar: tarfile.TarFile) -> Iterator[tarfile.TarInfo]:
+        for member in tar:
+            if member.isfile():
+                names.append(os.path.normpath(member.name))
+            yield member
+
+    with tarfile.open(fileobj=fileobj, mode="r|") as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(dest_local, members=members(tar), filter="data")
+        else:
+            tar.extractall(dest_local, members=members(tar))
+    return names
+
 
+@functools.lru_cache(maxsize=None)
+def device_has_nc(adb_path: str, serial: Optional[str] = None) -> bool:
+    """True if the device shell has a `nc` (toybox or busybox)."""
+    return bool(adb_shell(adb_path, "command -v nc 2>/dev/null", serial).strip())
+
+
+def _connect_forward(port: int, server: subprocess.Popen, timeout: float = 10.0):
+    """
+    Connect to the forwarded port and return a buffered reader on it.
+
+    adb accepts the host connection even before the device-side nc is
+    listening, and then just closes it, so retry until the first bytes show
+    up (or the device command exits). `timeout` only bounds the connect and
+    the wait for those first bytes; the returned reader blocks for as long
+    as the device's tar pauses (e.g. while it walks a big tree).
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=timeout) as sock:
+                reader = sock.makefile("rb")  # keeps the fd open past the with
+                try:
+                    first = reader.peek(1)
+                except OSError:
+                    reader.close()
+                    raise
+                sock.settimeout(None)
+            if first:
+                return reader
+            reader.close()
+        except OSError:
+            pass
+        if server.poll() is not None or time.monotonic() > deadline:
+            raise OSError(f"nothing is listening on forwarded tcp:{port}")
+        time.sleep(0.2)
+
+
+def fast_pull_via_forward(
+    adb_path: str,
+    phone_dir: str,
+    dest_local: str,
+    port: int = ADB_FORWARD_PORT_BASE,
+    extracted: Optional[List[str]] = None,
+    serial: Optional[str] = None
+) -> subprocess.CompletedProcess:
+    """
+    Like fast_pull_dir, but the tar stream is served by `nc` on the device
+    (listening on `port`) and read over `adb forward` as a plain socket,
+    bypassing adb's exec/sync framing. adb picks the host port, so several
+    devices can use this at once. The host port must be reachable from WSL
+    (WSL1, or WSL2 with mirrored networking).
+
+    Falls back to fast_pull_dir when the device has no nc, the adb is too
+    old to allocate a host port, or the socket stream fails (before or
+    mid-transfer; the tar over exec-out then rewrites the partial copy).
+    """
+    tag = log_tag("media", serial)
+    if not device_has_nc(adb_path, serial):
+        log(f"[INFO] No nc on device; using tar over exec-out for {phone_dir}.", tag)
+        return fast_pull_dir(adb_path, phone_dir, dest_local, extracted, serial)
+    if not device_has_tar(adb_path, serial):
+        log(f"[INFO] No tar on device; using adb pull for {phone_dir}.", tag)
+        return run_adb_stream(
+            adb_path, ["pull", phone_dir, adb_local_path(adb_path, os.path.dirname(dest_local))], serial=serial, tag=tag
+        )
+
+    # tcp:0 makes adb bind a free host port and print it
+    forward = run_adb(adb_path, ["forward", "tcp:0", f"tcp:{port}"], serial=serial)
+    host_port = forward.stdout.strip()
+    if forward.returncode != 0 or not host_port.isdigit():
+        log(f"[INFO] adb forward tcp:0 unsupported; using tar over exec-out for {phone_dir}.", tag)
+        return fast_pull_dir(adb_path, phone_dir, dest_local, extracted, serial)
+
+    cmd = adb_cmd(adb_path, serial) + [
+        "shell", f"tar -cf - -C {shlex.quote(phone_dir)} . 2>/dev/null | nc -l -p {port}"
+    ]
+    os.makedirs(dest_local, exist_ok=True)
+    server = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    error = ""
     try:
-        media_parent_win = wsl_to_win_path(media_parent_wsl)
-    except ValueError as e:
-        print(f"[PATH CONVERT FAIL] {e}")
-        return
+        with _connect_forward(int(host_port), server) as reader:
+            names = extract_tar_stream(reader, dest_local)
+            if extracted is not None:
+                extracted.extend(phone_dir + "/" + name for name in names)
+    except (tarfile.TarError, OSError) as e:
+        error = f"tar stream from {phone_dir} over tcp:{host_port} failed: {e}"
+    finally:
+        # Closing our end lets nc exit even if it doesn't quit on stdin EOF
+        try:
+            returncode = server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            returncode = server.wait()
+        run_adb(adb_path, ["forward", "--remove", f"tcp:{host_port}"], serial=serial)
+
+    if error:
+        log(f"[WARN] {error}; retrying with tar over exec-out.", tag)
+        return fast_pull_dir(adb_path, phone_dir, dest_local, extracted, serial)
+    return subprocess.CompletedProcess(cmd, returncode, "", "")
+
+
+def find_name_filter(ignore_patterns: Sequence[str], ignored: bool = False) -> str:
+    """
+    Turn the ignore globs into `find` predicates so the device does the
+    filtering and only the wanted paths cross the adb link. `-name` matches
+    the basename, as the globs always have. The kept files are
+    `! -name p1 ! -name p2 ...`; with `ignored`, the ignored ones are
+    `\\( -name p1 -o -name p2 ... \\)`. Empty when there are no patterns.
+    """
+    if not ignore_patterns:
+        return ""
+    if not ignored:
+        return "".join(f" ! -name {shlex.quote(p)}" for p in ignore_patterns)
+    names = " -o ".join(f"-name {shlex.quote(p)}" for p in ignore_patterns)
+    return f" \\( {names} \\)"
 
-    for phone_dir in media_dirs:
-        phone_dir = phone_dir.rstrip("/")
-        name = os.path.basename(phone_dir)
 
-        if not name:
-            print(f"[SKIP] Invalid media dir: {phone_dir}")
-            continue
+def list_ignored_files(
+    adb_path: str,
+    phone_dir: str,
+    ignore_patterns: Sequence[str],
+    serial: Optional[str] = None
+) -> List[str]:
+    """
+    List just the files under phone_dir that the ignore globs skip, for the
+    `[DOWNLOAD] Ignoring:` log.
+    """
+    if not ignore_patterns:
+        return []
+    return list(adb_shell_iter(
+        adb_path,
+        f"find {shlex.quote(phone_dir)} -type f{find_name_filter(ignore_patterns, ignored=True)} 2>/dev/null",
+        serial,
+    ))
 
-        # --- Special handling for Download --- #
-        if name.lower() == "download" and download_ignore_patterns:
-            print(f"[STEP] Backing up filtered Download media from {phone_dir} ...")
-            out = adb_shell(adb_path, f"find {phone_dir} -type f 2>/dev/null")
-            all_files = [line.strip() for line in out.splitlines() if line.strip()]
-
-            files_to_copy = [
-                f for f in all_files
-                if not should_ignore_download_file(f, download_ignore_patterns)
-            ]
-            ignored_files = [f for f in all_files if f not in files_to_copy]
-
-            print(f"[DOWNLOAD] {len(all_files)} files total, "
-                  f"{len(files_to_copy)} after ignore rules.")
-            if ignored_files:
-                print("[DOWNLOAD] Ignoring:")
-                for f in ignored_files:
-                    print("   ", f)
-
-            for f in files_to_copy:
-                # Preserve subdirectory structure under Download
-                if f.startswith(phone_dir + "/"):
-                    rel = f[len(phone_dir) + 1:]
-                else:
-                    rel = os.path.basename(f)
-
-                rel_dir = os.path.dirname(rel)
-                filename = os.path.basename(rel)
-
-                dest_dir_wsl = os.path.join(media_parent_wsl, "Download", rel_dir)
-                os.makedirs(dest_dir_wsl, exist_ok=True)
 
+def scan_and_pull(
+    adb_path: str,
+    media_dirs: Sequence[str],
+    dest_wsl: str,
+    ignore_patterns: Sequence[str],
+    workers: int = 4,
+    serial: Optional[str] = None
+) -> Deque[str]:
+    """
+    Pipeline the device-side `find` with the pulls: a producer thread
+    streams `find <dir> -type f ! -name <pattern>...` line by line (the
+    device drops ignored files; see find_name_filter) and groups them by
+    folder into batches of up to PULL_CHUNK_FILES; a pool of consumers
+    pulls each batch with one `adb pull a b c <dest>` into:
+        <dest_wsl>/<Name>/<relpath>
+
+    Batches go out once full, so a big folder starts pulling before the
+    walk finishes; partial ones go out when it does.
+
+    Returns the phone paths that were pulled successfully, so the caller
+    can hand them to the delete script without walking the phone again.
+    """
+    tag = log_tag("media", serial)
+    work: "queue.Queue[Optional[Tuple[str, str, List[str]]]]" = queue.Queue(maxsize=64)
+    pulled: Deque[str] = deque()
+    ignored: List[str] = []
+    seen = [0]
+    lock = threading.Lock()
+    # dest_dir_wsl -> dest_dir_win for folders already created, so later
+    # batches for a big folder skip the makedirs walk and path conversion
+    dest_dirs: Dict[str, str] = {}
+
+    def produce() -> None:
+        # Only this thread touches seen/ignored/pending
+        pending: Dict[Tuple[str, str], List[str]] = {}
+        try:
+            for phone_dir in media_dirs:
+                ignored.extend(list_ignored_files(adb_path, phone_dir, ignore_patterns, serial))
+                find_cmd = f"find {shlex.quote(phone_dir)} -type f{find_name_filter(ignore_patterns)} 2>/dev/null"
+                for f in adb_shell_iter(adb_path, find_cmd, serial):
+                    seen[0] += 1
+
+                    # Preserve subdirectory structure under <Name>
+                    if f.startswith(phone_dir + "/"):
+                        rel = f[len(phone_dir) + 1:]
+                    else:
+                        rel = os.path.basename(f)
+
+                    key = (phone_dir, os.path.dirname(rel))
+                    batch = pending.setdefault(key, [])
+                    batch.append(f)
+                    if len(batch) >= PULL_CHUNK_FILES:
+                        work.put((*key, pending.pop(key)))
+            for key, batch in pending.items():
+                work.put((*key, batch))
+        finally:
+            for _ in range(workers):
+                work.put(None)
+
+    def consume() -> None:
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            phone_dir, rel_dir, batch = item
+
+            dest_dir_wsl = os.path.join(dest_wsl, os.path.basename(phone_dir), rel_dir)
+            dest_dir_win = dest_dirs.get(dest_dir_wsl)
+            if dest_dir_win is None:
+                os.makedirs(dest_dir_wsl, exist_ok=True)
                 try:
-                    dest_dir_win = wsl_to_win_path(dest_dir_wsl)
+                    dest_dir_win = adb_local_path(adb_path, dest_dir_wsl)
                 except ValueError as e:
-                    print(f"[PATH CONVERT FAIL] {e}")
+                    log(f"[PATH CONVERT FAIL] {e}", tag)
                     continue
+                dest_dirs[dest_dir_wsl] = dest_dir_win
+
+            log(f"[COPY] {len(batch)} files from {os.path.dirname(batch[0])} -> {dest_dir_win}", tag)
+            result = run_adb_stream(adb_path, ["pull", *batch, dest_dir_win], serial=serial, tag=tag)
+            if result.returncode == 0:
+                ok = batch
+            else:
+                # adb pull carries on past a bad file; keep whichever arrived
+                log(f"[WARN] Some files failed to copy: {result.stderr.strip()}", tag)
+                ok = [f for f in batch
+                      if os.path.isfile(os.path.join(dest_dir_wsl, os.path.basename(f)))]
+            with lock:
+                pulled.extend(ok)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(consume) for _ in range(workers)]:
+            future.result()
+    producer.join()
+
+    print_download_summary(seen[0] + len(ignored), ignored, tag)
+    return pulled
+
+
+def print_download_summary(total: int, ignored: Sequence[str], tag: str = "") -> None:
+    lines = [f"[DOWNLOAD] {total} files total, {total - len(ignored)} after ignore rules."]
+    if ignored:
+        lines.append("[DOWNLOAD] Ignoring:")
+        lines.extend(f"    {f}" for f in ignored)
+    log("\n".join(lines), tag)
+
+
+def tar_pull_filtered(
+    adb_path: str,
+    media_dirs: Sequence[str],
+    dest_wsl: str,
+    ignore_patterns: Sequence[str],
+    serial: Optional[str] = None
+) -> Deque[str]:
+    """
+    USE_TAR_STREAM version of scan_and_pull: list each dir's kept files
+    (filtered on the device, as there), then feed their relative paths to
+    a device-side `tar -T -` and stream just those files back as one tar
+    over `adb shell -T`, instead of one adb pull per file. Extracts into
+    <dest_wsl>/<Name>/<relpath>.
 
-                print(f"[COPY] {f} -> {dest_dir_win}")
-                result = run_adb(adb_path, ["pull", f, dest_dir_win])
-                if result.returncode != 0:
-                    print(f"[WARN] Failed to copy {f}: {result.stderr.strip()}")
+    Returns the phone paths that were pulled successfully.
+    """
+    tag = log_tag("media", serial)
+    pulled: Deque[str] = deque()
+    ignored: List[str] = []
+    total = 0
+
+    for phone_dir in media_dirs:
+        name = os.path.basename(phone_dir)
+        dir_ignored = list_ignored_files(adb_path, phone_dir, ignore_patterns, serial)
+        ignored.extend(dir_ignored)
+        total += len(dir_ignored)
+        keep: List[str] = []
+        find_cmd = f"find {shlex.quote(phone_dir)} -type f{find_name_filter(ignore_patterns)} 2>/dev/null"
+        for f in adb_shell_iter(adb_path, find_cmd, serial):
+            total += 1
+            if f.startswith(phone_dir + "/"):
+                keep.append(f)
+        if not keep:
+            continue
+
+        dest_local = os.path.join(dest_wsl, name)
+        os.makedirs(dest_local, exist_ok=True)
+        # The list is tar's own stdin (`-T -`) in the same device command,
+        # so tar never reads a list file that is still being written.
+        # exec-out takes no stdin; shell -T (no pty) carries it and keeps
+        # stdout binary-safe. The list is spooled to a temp file so feeding
+        # it can't block on tar output we haven't read yet.
+        cmd = adb_cmd(adb_path, serial) + [
+            "shell", "-T", f"tar -cf - -C {shlex.quote(phone_dir)} -T - 2>/dev/null",
+        ]
+        log(f"[COPY] {len(keep)} files from {phone_dir} -> {dest_local} (tar stream)", tag)
+        with tempfile.TemporaryFile() as rel_paths:
+            for f in keep:
+                rel_paths.write(f[len(phone_dir) + 1:].encode("utf-8", "surrogateescape") + b"\n")
+            rel_paths.seek(0)
+            proc = subprocess.Popen(cmd, stdin=rel_paths, stdout=subprocess.PIPE)
+            try:
+                extract_tar_stream(proc.stdout, dest_local)
+            except (tarfile.TarError, OSError) as e:
+                log(f"[WARN] tar stream from {phone_dir} failed: {e}", tag)
+            finally:
+                proc.stdout.close()
+                proc.wait()
+
+        # tar skips unreadable files without failing the stream, so only
+        # report what actually landed (the delete script trusts this list)
+        for f in keep:
+            if os.path.isfile(os.path.join(dest_local, f[len(phone_dir) + 1:])):
+                pulled.append(f)
+            else:
+                log(f"[WARN] Failed to copy {f}", tag)
+
+    print_download_summary(total, ignored, tag)
+    return pulled
+
+
+def backup_media_dirs(
+    adb_path: str,
+    media_dirs: Sequence[str],
+    run_dir: str,
+    media_parent_wsl: str,
+    media_parent_win: str,
+    download_ignore_patterns: Sequence[str],
+    parallelism: int = 4,
+    incremental: bool = False,
+    prev_run_dir: Optional[str] = None,
+    use_tar_stream: bool = False,
+    use_adb_forward: bool = False,
+    download_parallelism: int = 8,
+    serial: Optional[str] = None
+) -> Deque[str]:
+    """
+    For each media dir (e.g. /sdcard/DCIM/Camera, /sdcard/Pictures, /sdcard/Download),
+    back up contents into:
+        <run_dir>/media/<Name>/...
 
-            continue  # Skip bulk pull for Download
+    - Camera/Pictures/Movies/etc. use bulk adb pull, up to `parallelism`
+      dirs at a time (the adb server multiplexes concurrent transfers).
+      Their file list for the delete script is collected while they pull.
+    - With `incremental`, those dirs are listed with size/mtime instead and
+      only paths that differ from prev_run_dir's manifest-<Name>.json are
+      pulled (in per-subdir chunks); unchanged files are hardlinked from
+      prev_run_dir. The new manifest is written to run_dir.
+    - Otherwise, with `use_tar_stream`, each dir arrives as one tar stream
+      (see fast_pull_dir), which wins for dirs full of small files. The
+      tar's own member list then doubles as the delete-script listing.
+      `use_adb_forward` sends that stream over a forwarded TCP port
+      instead (see fast_pull_via_forward); each dir gets its own device port.
+    - Download is treated specially: we honor DOWNLOAD_IGNORE_PATTERNS
+      and skip matching files (see scan_and_pull; with `incremental` it
+      goes through the manifest path, minus the ignored files). Its
+      per-file pulls are latency-bound, so they get their own
+      `download_parallelism` workers; with `use_tar_stream` the kept
+      files come back as one tar instead (see tar_pull_filtered).
+
+    media_dirs come normalized from load_config() (no trailing "/").
+    media_parent_wsl/_win (<run_dir>/media) come from prepare_run_layout().
+    Returns the phone paths that were backed up.
+    """
+    tag = log_tag("media", serial)
+    backed_up: Deque[str] = deque()
+    bulk_futures = {}
+    bulk_dirs: List[str] = []
+    filtered_dirs: List[str] = []
+    manifests: Dict[str, Dict[str, List[int]]] = {}
+    # Tar-streamed dirs report the files they extracted, so they need no
+    # separate `find` for the delete script
+    streamed: Dict[str, List[str]] = {}
+    tar_streams = bool(use_tar_stream or use_adb_forward) and device_has_tar(adb_path, serial)
+    if (use_tar_stream or use_adb_forward) and not tar_streams:
+        log("[INFO] No tar on device; using adb pull for media dirs.", tag)
+    failed_dirs = set()
+    with ThreadPoolExecutor(max_workers=max(1, min(len(media_dirs), parallelism))) as executor:
+        for phone_dir in media_dirs:
+            name = os.path.basename(phone_dir)
+
+            # --- Special handling for Download --- #
+            filtered = name.lower() == "download" and bool(download_ignore_patterns)
+            if filtered and not incremental:
+                log(f"[STEP] Backing up filtered Download media from {phone_dir} ...", tag)
+                filtered_dirs.append(phone_dir)
+                continue  # Skip bulk pull for Download
+
+            bulk_dirs.append(phone_dir)
+
+            # --- Incremental: only pull what changed since the previous run --- #
+            if incremental:
+                log(f"[STEP] Backing up new/changed media from {phone_dir} ...", tag)
+                # Ignored Download files never enter the manifest
+                dir_ignore = download_ignore_patterns if filtered else ()
+                manifest = list_media_files_with_stat(adb_path, phone_dir, serial, dir_ignore)
+                if filtered:
+                    ignored = list_ignored_files(adb_path, phone_dir, dir_ignore, serial)
+                    print_download_summary(len(manifest) + len(ignored), ignored, tag)
+                manifests[phone_dir] = manifest
+                prev_manifest = load_manifest(prev_run_dir, name, tag)
+                changed = [p for p, meta in manifest.items() if prev_manifest.get(p) != meta]
+                log(f"[INCREMENTAL] {phone_dir}: {len(changed)} of {len(manifest)} files new or changed.", tag)
+                if prev_run_dir:
+                    unchanged = [p for p, meta in manifest.items() if prev_manifest.get(p) == meta]
+                    changed += link_unchanged_files(
+                        phone_dir, unchanged,
+                        os.path.join(prev_run_dir, "media", name),
+                        os.path.join(media_parent_wsl, name),
+                        tag,
+                    )
+
+                for rel_dir, chunk in chunk_pulls_by_dir(phone_dir, changed):
+                    dest_dir_wsl = os.path.join(media_parent_wsl, name, rel_dir)
+                    os.makedirs(dest_dir_wsl, exist_ok=True)
+                    try:
+                        dest_dir_win = adb_local_path(adb_path, dest_dir_wsl)
+                    except ValueError as e:
+                        log(f"[PATH CONVERT FAIL] {e}", tag)
+                        continue
+                    future = executor.submit(run_adb_stream, adb_path, ["pull", *chunk, dest_dir_win], serial, tag)
+                    bulk_futures[future] = phone_dir
+                continue
 
-        # --- Default bulk handling for other media dirs --- #
-        print(f"[STEP] Backing up media from {phone_dir} ...")
-        result = run_adb(adb_path, ["pull", phone_dir, media_parent_win])
-        if result.returncode != 0:
-            print("[WARN] Media backup may have failed for {phone_dir}:")
-            print(result.stderr.strip())
+            # --- Default bulk handling for other media dirs --- #
+            # Submitted to the pool so they run while the Download branch works.
+            log(f"[STEP] Backing up media from {phone_dir} ...", tag)
+            if tar_streams and use_adb_forward:
+                port = ADB_FORWARD_PORT_BASE + len(bulk_futures)
+                future = executor.submit(
+                    fast_pull_via_forward, adb_path, phone_dir, os.path.join(media_parent_wsl, name), port,
+                    streamed.setdefault(phone_dir, []), serial
+                )
+            elif tar_streams:
+                future = executor.submit(
+                    fast_pull_dir, adb_path, phone_dir, os.path.join(media_parent_wsl, name),
+                    streamed.setdefault(phone_dir, []), serial
+                )
+            else:
+                future = executor.submit(run_adb_stream, adb_path, ["pull", phone_dir, media_parent_win], serial, tag)
+            bulk_futures[future] = phone_dir
+
+        # List the bulk dirs (for the delete script) while their pulls are
+        # running, and file each path under every configured dir that
+        # contains it in one pass (walking up the path's parents) rather than
+        # rescanning per dir.
+        plain_dirs = [d for d in bulk_dirs if d not in manifests and d not in streamed]
+        listing_by_dir: Dict[str, List[str]] = {d: [] for d in plain_dirs}
+        if plain_dirs:
+            for f in list_media_files_for_delete(adb_path, plain_dirs, serial):
+                parent = f.rpartition("/")[0]
+                while parent:
+                    if parent in listing_by_dir:
+                        listing_by_dir[parent].append(f)
+                    parent = parent.rpartition("/")[0]
+
+        if filtered_dirs and use_tar_stream and device_has_tar(adb_path, serial):
+            backed_up.extend(tar_pull_filtered(
+                adb_path, filtered_dirs, media_parent_wsl, download_ignore_patterns, serial
+            ))
+        elif filtered_dirs:
+            backed_up.extend(scan_and_pull(
+                adb_path, filtered_dirs, media_parent_wsl, download_ignore_patterns, download_parallelism, serial
+            ))
+
+        for future in as_completed(bulk_futures):
+            phone_dir = bulk_futures[future]
+            result = future.result()
+            if result.returncode != 0:
+                failed_dirs.add(phone_dir)
+                log(f"[WARN] Media backup may have failed for {phone_dir}:\n{result.stderr.strip()}", tag)
+
+    for phone_dir in bulk_dirs:
+        if phone_dir in failed_dirs:
+            continue
+        log(f"[OK] Media from {phone_dir} backed up under {media_parent_wsl}", tag)
+        if phone_dir in manifests:
+            # Only record a manifest once its pulls succeeded, so a failed
+            # run doesn't make the next one skip files it never copied.
+            save_manifest(run_dir, os.path.basename(phone_dir), manifests[phone_dir])
+            backed_up.extend(manifests[phone_dir])
+        elif phone_dir in streamed:
+            backed_up.extend(streamed[phone_dir])
         else:
-            print(f"[OK] Media from {phone_dir} backed up under {media_parent_wsl}")
+            backed_up.extend(listing_by_dir[phone_dir])
+
+    return backed_up
 
 
-def list_media_files_for_delete(adb_path: str, media_dirs: List[str]) -> List[str]:
+def list_media_files_for_delete(
+    adb_path: str,
+    media_dirs: Sequence[str],
+    serial: Optional[str] = None
+) -> List[str]:
     """
-    For each media dir, list all files to include in the delete script.
+    List all files under the media dirs to include in the delete script,
+    using one `find dir1 dir2 ... -type f` so the device walks every tree
+    in a single shell round-trip.
     """
     all_files: List[str] = []
-    for phone_dir in media_dirs:
-        phone_dir = phone_dir.rstrip("/")
-        if not phone_dir:
-            continue
-        print(f"[SCAN] Listing files for delete under {phone_dir} ...")
-        out = adb_shell(adb_path, f"find {phone_dir} -type f 2>/dev/null")
-        for line in out.splitlines():
-            p = line.strip()
-            if p:
-                all_files.append(p)
-    print(f"[INFO] Collected {len(all_files)} media files for potential deletion.")
+    if not media_dirs:
+        return all_files
+
+    tag = log_tag("media", serial)
+    log(f"[SCAN] Listing files for delete under {', '.join(media_dirs)} ...", tag)
+    dirs_joined = " ".join(shlex.quote(d) for d in media_dirs)
+    all_files.extend(adb_shell_iter(adb_path, f"find {dirs_joined} -type f 2>/dev/null", serial))
+    log(f"[INFO] Collected {len(all_files)} media files for potential deletion.", tag)
     return all_files
 
 
-def generate_delete_script(media_files: List[str]) -> None:
+# Rendered with str.format: {serial} is the target device, {list_name} the
+# sibling .lst file holding the phone paths, and doubled braces are literal
+# braces in the generated script.
+DELETE_SCRIPT_TEMPLATE = """\
+import os
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv()
+ADB_PATH = os.getenv('ADB_PATH_LINUX') or os.getenv('ADB_PATH_WSL')
+
+if not ADB_PATH:
+    raise SystemExit('[ERROR] ADB_PATH_WSL (or ADB_PATH_LINUX) not set in .env')
+
+ADB_SERIAL = {serial!r}
+
+# One phone path per line; delete a line there to keep that file.
+LIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), {list_name!r})
+
+def load_phone_files():
+    # Bytes, so odd filenames survive untouched; tolerate CRLF from editors
+    with open(LIST_FILE, 'rb') as f:
+        return [line.rstrip(b'\\r') for line in f.read().split(b'\\n') if line.strip()]
+
+def run_adb(args, input_bytes=None):
+    cmd = [ADB_PATH] + (['-s', ADB_SERIAL] if ADB_SERIAL else []) + args
+    return subprocess.run(cmd, input=input_bytes)
+
+def main(phone_files):
+    for p in phone_files:
+        print(f"Deleting {{p.decode('utf-8', 'replace')}} ...")
+    # One adb call: the NUL-separated list is xargs' own stdin, so there is
+    # no device-side copy that a second command could read half-written.
+    # shell -T carries that stdin and, unlike exec-in, rm's exit status.
+    data = b'\\0'.join(phone_files) + b'\\0'
+    result = run_adb(['shell', '-T', 'xargs -0 rm -f'], input_bytes=data)
+    if result.returncode != 0:
+        print('[WARN] Some files may not have been deleted.')
+
+if __name__ == '__main__':
+    phone_files = load_phone_files()
+    if not phone_files:
+        raise SystemExit(f'Nothing to delete; {{LIST_FILE}} is empty.')
+    confirm = input(f'Type DELETE to remove these {{len(phone_files)}} media files from the phone: ')
+    if confirm.strip() == 'DELETE':
+        main(phone_files)
+    else:
+        print('Aborted; no deletions performed.')
+"""
+
+
+def generate_delete_script(
+    media_files: Sequence[str],
+    run_start: datetime,
+    serial: Optional[str] = None
+) -> None:
     """
-    Generate a timestamped Python script that safely deletes phone files
-    using adb shell rm, with proper shell escaping.
+    Generate a timestamped Python script that safely deletes phone files.
+    The phone paths go one per line into a sibling files_to_delete_<ts>.lst,
+    so the script itself stays a few dozen lines whatever the file count.
+    At delete time it sends them to the device as one NUL-separated list and
+    removes them with a single `xargs -0 rm -f`. The timestamp is the run's
+    start time, so it matches the run directory name. With a serial, the
+    script targets that device; its name includes the serial when several
+    devices are backed up at once.
     """
+    tag = log_tag(serial=serial)
     if not media_files:
-        print("[INFO] No media files collected; delete script will not be generated.")
+        log("[INFO] No media files collected; delete script will not be generated.", tag)
         return
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    timestamp = run_start.strftime("%Y%m%d_%H%M")
+    if device_label(serial):
+        timestamp = f"{device_dir_name(serial)}_{timestamp}"
     filename = f"files_to_delete_{timestamp}.py"
+    list_name = f"files_to_delete_{timestamp}.lst"
     script_path = os.path.join(os.getcwd(), filename)
-
-    lines: List[str] = []
-    lines.append("import os")
-    lines.append("import subprocess")
-    lines.append("from dotenv import load_dotenv")
-    lines.append("")
-    lines.append("load_dotenv()")
-    lines.append("ADB_PATH = os.getenv('ADB_PATH_WSL')")
-    lines.append("")
-    lines.append("if not ADB_PATH:")
-    lines.append("    raise SystemExit('[ERROR] ADB_PATH_WSL not set in .env')")
-    lines.append("")
-    lines.append("PHONE_FILES = [")
-    for p in media_files:
-        lines.append(f"    r\"{p}\",")
-    lines.append("]")
-    lines.append("")
-    lines.append("def run_adb(args):")
-    lines.append("    cmd = [ADB_PATH] + args")
-    lines.append("    return subprocess.run(cmd, text=True)")
-    lines.append("")
-    lines.append("def main():")
-    lines.append("    import shlex")
-    lines.append("    for path in PHONE_FILES:")
-    lines.append("        esc = shlex.quote(path)")
-    lines.append("        print(f'Deleting {path} ...')")
-    lines.append("        run_adb(['shell', f\"rm -f {esc}\"])")
-    lines.append("")
-    lines.append("if __name__ == '__main__':")
-    lines.append("    confirm = input('Type DELETE to remove these media files from the phone: ')")
-    lines.append("    if confirm.strip() == 'DELETE':")
-    lines.append("        main()")
-    lines.append("    else:")
-    lines.append("        print('Aborted; no deletions performed.')")
-    lines.append("")
-
+    list_path = os.path.join(os.getcwd(), list_name)
+
+    # surrogateescape writes non-UTF-8 names back as their original bytes
+    with open(list_path, "w", encoding="utf-8", errors="surrogateescape",
+              newline="\n", buffering=1 << 20) as f:
+        for p in media_files:
+            f.write(p)
+            f.write("\n")
     with open(script_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+        f.write(DELETE_SCRIPT_TEMPLATE.format(serial=serial, list_name=list_name))
 
-    print(f"[GENERATED] Delete script: {script_path}")
-    print("           (Run this later *after* verifying your backup.)")
+    log(
+        f"[GENERATED] Delete script: {script_path}\n"
+        f"           File list: {list_path}\n"
+        "           (Run this later *after* verifying your backup.)",
+        tag,
+    )
 
 
 # ----------------- PORTODB SHA + DEDUPE HELPERS ----------------- #
 
+def iter_files(root: str) -> Iterator[os.DirEntry]:
+    """
+    Yield a DirEntry for every regular file under root. os.scandir hands
+    back the file type with each entry, so unlike os.walk this needs no
+    extra stat per name to tell files from dirs (slow on /mnt/c drvfs).
+    Symlinks are not followed.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _new_sha256():
+    """
+    SHA-256 for change detection, not security: usedforsecurity=False keeps
+    FIPS-mode OpenSSL builds on their normal (SHA-NI capable) code path.
+    """
+    try:
+        return hashlib.new("sha256", usedforsecurity=False)
+    except TypeError:  # Python < 3.9
+        return hashlib.sha256()
+
+
+# Files at least this big are hashed straight from a read-only mmap
+SHA256_MMAP_MIN_SIZE = 32 * 1024 * 1024
+
+
 def compute_sha256(path: str) -> str:
     """
-    Compute SHA256 for a file in a streaming-safe way.
+    Compute SHA256 for a file in a streaming-safe way. Big files (large
+    sqlite DBs) are mmapped so the hasher reads the page cache directly,
+    with no copy into Python buffers. Otherwise, on Python 3.11+,
+    hashlib.file_digest does the read loop in C into a reused buffer.
     """
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
+    with open(path, "rb", buffering=0) as f:
+        if os.fstat(f.fileno()).st_size >= SHA256_MMAP_MIN_SIZE:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    h = _new_sha256()
+                    h.update(mm)
+                    return h.hexdigest()
+            except (OSError, ValueError):
+                pass  # filesystem without mmap support; read it instead
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, _new_sha256).hexdigest()
+        h = _new_sha256()
         for chunk in iter(lambda: f.read(1024 * 1024), b""):
             h.update(chunk)
-    return h.hexdigest()
-
-def write_sha256_file(portodb_root: str) -> Dict[str, str]:
+        return h.hexdigest()
+
+def write_sha256_file(
+    portodb_root: str,
+    cache: Optional[Mapping[str, Dict[str, Any]]] = None,
+    unchanged: Optional[List[str]] = None,
+    tag: str = ""
+) -> Dict[str, Dict[str, Any]]:
     """
     Walk portodb_root and write SHA256.txt into that directory.
-    Returns a dict: relative_path_from_portodb_root -> sha256.
+    Returns a dict: relative_path_from_portodb_root -> {size, mtime_ns, sha}.
+
+    cache is the previous PortoDB log; a file whose size and mtime_ns match
+    its cached entry reuses that sha instead of being re-read. Files whose
+    sha equals the cached one are appended (as full paths) to `unchanged`
+    in the same pass, so the caller needs no second loop over the result.
+
+    Files are hashed on a thread pool: hashlib releases the GIL while it
+    digests, so threads scale across cores without pickling paths and
+    digests to worker processes.
     """
-    sha_map: Dict[str, str] = {}
+    sha_map: Dict[str, Dict[str, Any]] = {}
     sha_file_path = os.path.join(portodb_root, "SHA256.txt")
+    cache = cache or {}
 
-    lines: List[str] = []
+    to_hash: List[Tuple[str, str]] = []
 
-    for root, dirs, files in os.walk(portodb_root):
-        for name in files:
-            full_path = os.path.join(root, name)
+    # Lines go straight to the file: cached ones during the walk, the rest
+    # as their digests come back, so no second copy is held for a join.
+    with open(sha_file_path, "w", encoding="utf-8", buffering=1 << 20) as sha_file:
+        for dir_entry in iter_files(portodb_root):
+            full_path = dir_entry.path
 
             # Don't hash our own SHA file if re-run
-            if os.path.abspath(full_path) == os.path.abspath(sha_file_path):
+            if full_path == sha_file_path:
                 continue
 
             rel_path = os.path.relpath(full_path, portodb_root)
-            sha256 = compute_sha256(full_path)
-            sha_map[rel_path] = sha256
-            lines.append(f"{sha256}  {rel_path}")
-
-    with open(sha_file_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines) + ("\n" if lines else ""))
-
-    print(f"[OK] SHA256.txt written with {len(sha_map)} entries at {sha_file_path}")
+            st = dir_entry.stat(follow_symlinks=False)
+            entry: Dict[str, Any] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            prev = cache.get(rel_path)
+            if (
+                prev is not None
+                and prev.get("size") == st.st_size
+                and prev.get("mtime_ns") == st.st_mtime_ns
+                and prev.get("sha")
+            ):
+                entry["sha"] = prev["sha"]
+                sha_file.write(f"{entry['sha']}  {rel_path}\n")
+                if unchanged is not None:
+                    unchanged.append(full_path)
+            else:
+                to_hash.append((rel_path, full_path))
+            sha_map[rel_path] = entry
+
+        if to_hash:
+            workers = min(len(to_hash), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                digests = executor.map(compute_sha256, [full for _, full in to_hash])
+                for (rel_path, full_path), sha256 in zip(to_hash, digests):
+                    sha_map[rel_path]["sha"] = sha256
+                    sha_file.write(f"{sha256}  {rel_path}\n")
+                    if unchanged is not None and cache.get(rel_path, {}).get("sha") == sha256:
+                        unchanged.append(full_path)
+
+    reused = len(sha_map) - len(to_hash)
+    if reused:
+        log(f"[INFO] Reused cached SHA256 for {reused} unchanged PortoDB files (size/mtime match).", tag)
+    log(f"[OK] SHA256.txt written with {len(sha_map)} entries at {sha_file_path}", tag)
     return sha_map
 
 
-def load_portodb_log(log_path: str) -> Dict[str, str]:
+def load_portodb_log(log_path: str, tag: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    Load the running PortoDB log: rel_path -> {size, mtime_ns, sha}.
+    Entries from the older rel_path -> sha format keep their sha for the
+    unchanged check but carry no stat, so those files are re-hashed once.
+    """
     if not os.path.exists(log_path):
         return {}
     try:
         with open(log_path, "r", encoding="utf-8") as f:
             data = json.load(f)
-        if isinstance(data, dict):
-            return {str(k): str(v) for k, v in data.items()}
-        return {}
+        if not isinstance(data, dict):
+            return {}
+        entries: Dict[str, Dict[str, Any]] = {}
+        for k, v in data.items():
+            if isinstance(v, dict):
+                entries[str(k)] = v
+            else:
+                entries[str(k)] = {"sha": str(v)}
+        return entries
     except Exception as e:
-        print(f"[WARN] Could not read existing PortoDB SHA log: {e}")
+        log(f"[WARN] Could not read existing PortoDB SHA log: {e}", tag)
         return {}
 
 
-def save_portodb_log(log_path: str, data: Dict[str, str]) -> None:
+def save_portodb_log(log_path: str, data: Dict[str, Dict[str, Any]], tag: str = "") -> None:
     tmp_path = log_path + ".tmp"
+    # Compact and unsorted: the log is rewritten and re-parsed every run.
+    # `python -m json.tool` pretty-prints it if you need to read it.
     with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, sort_keys=True)
+        json.dump(data, f, separators=(",", ":"))
     os.replace(tmp_path, log_path)
-    print(f"[OK] PortoDB SHA log updated at {log_path}")
+    log(f"[OK] PortoDB SHA log updated at {log_path}", tag)
+
+
+# Rendered with str.format: {paths} is a Python list literal of the
+# destination files, one repr() per line (repr round-trips any str, quotes,
+# backslashes, non-BMP characters and surrogate-escaped bytes included),
+# and doubled braces are literal braces in the generated script.
+PORTODB_DELETE_SCRIPT_TEMPLATE = """\
+import os
 
+FILES_TO_DELETE = {paths}
 
-def generate_portodb_delete_script(files_to_delete: List[str]) -> None:
+def main():
+    for path in FILES_TO_DELETE:
+        if os.path.exists(path):
+            print(f'Removing {{path}} ...')
+            try:
+                os.remove(path)
+            except Exception as e:
+                print(f'  [WARN] Failed to remove {{path}}: {{e}}')
+        else:
+            print(f'Skipping {{path}}; does not exist.')
+
+if __name__ == '__main__':
+    confirm = input('Type DELETE PORTODB to remove unchanged destination PortoDB files: ')
+    if confirm.strip() == 'DELETE PORTODB':
+        main()
+    else:
+        print('Aborted; no deletions performed.')
+"""
+
+
+def generate_portodb_delete_script(files_to_delete: List[str], serial: Optional[str] = None) -> None:
     """
     Generate a timestamped Python script that deletes *destination* PortoDB
     files whose SHA256 has not changed since last export.
     """
+    tag = log_tag("portodb", serial)
     if not files_to_delete:
-        print("[INFO] No unchanged PortoDB files this run; no delete script generated.")
+        log("[INFO] No unchanged PortoDB files this run; no delete script generated.", tag)
         return
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    if device_label(serial):
+        timestamp = f"{device_dir_name(serial)}_{timestamp}"
     filename = f"delete_unchanged_portodb_{timestamp}.py"
     script_path = os.path.join(os.getcwd(), filename)
 
-    lines: List[str] = []
-    lines.append("import os")
-    lines.append("")
-    lines.append("FILES_TO_DELETE = [")
-    for p in files_to_delete:
-        lines.append(f"    r\"{p}\",")
-    lines.append("]")
-    lines.append("")
-    lines.append("def main():")
-    lines.append("    for path in FILES_TO_DELETE:")
-    lines.append("        if os.path.exists(path):")
-    lines.append("            print(f'Removing {path} ...')")
-    lines.append("            try:")
-    lines.append("                os.remove(path)")
-    lines.append("            except Exception as e:")
-    lines.append("                print(f'  [WARN] Failed to remove {path}: {e}')")
-    lines.append("        else:")
-    lines.append("            print(f'Skipping {path}; does not exist.')")
-    lines.append("")
-    lines.append("if __name__ == '__main__':")
-    lines.append("    confirm = input('Type DELETE PORTODB to remove unchanged destination PortoDB files: ')")
-    lines.append("    if confirm.strip() == 'DELETE PORTODB':")
-    lines.append("        main()")
-    lines.append("    else:")
-    lines.append("        print('Aborted; no deletions performed.')")
-    lines.append("")
-
     with open(script_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+        paths = "[\n" + "".join(f"    {p!r},\n" for p in files_to_delete) + "]"
+        f.write(PORTODB_DELETE_SCRIPT_TEMPLATE.format(paths=paths))
 
-    print(f"[GENERATED] PortoDB dedupe delete script: {script_path}")
-    print("           (Run this to remove unchanged destination PortoDB files for this run.)")
+    log(
+        f"[GENERATED] PortoDB dedupe delete script: {script_path}\n"
+        "           (Run this to remove unchanged destination PortoDB files for this run.)",
+        tag,
+    )
 
 
-def process_portodb_hashes_and_dedupe(portodb_root: str, backup_root: str) -> None:
+def process_portodb_hashes_and_dedupe(
+    portodb_root: str,
+    backup_root: str,
+    serial: Optional[str] = None
+) -> None:
     """
     After PortoDB pull into portodb_root, generate SHA256.txt,
     update the running log, and create a delete script for unchanged files.
     """
+    tag = log_tag("portodb", serial)
     if not os.path.isdir(portodb_root):
-        print(f"[INFO] PortoDB backup directory not found at {portodb_root}; skipping SHA/dedupe.")
+        log(f"[INFO] PortoDB backup directory not found at {portodb_root}; skipping SHA/dedupe.", tag)
         return
 
-    # 1. Generate SHA256.txt for this run
-    current_map = write_sha256_file(portodb_root)
-
-    # 2. Load running log
+    # 1. Load running log
     log_path = os.path.join(backup_root, "portodb_sha_log.json")
-    old_log = load_portodb_log(log_path)
+    old_log = load_portodb_log(log_path, tag)
 
-    # 3. Determine which files are unchanged from last run
+    # 2. Generate SHA256.txt for this run, reusing logged shas on size/mtime
+    # match, and collect the files unchanged from last run in the same walk.
     # Key: relative path from portodb_root (e.g. "PortoDB/mydb.sqlite")
-    # We track per relative path across runs.
+    # We track per relative path across runs; unchanged files get their
+    # *new* copy marked for deletion.
     unchanged_abs_paths: List[str] = []
-    new_log = dict(old_log)  # carry forward any existing entries
+    current_map = write_sha256_file(portodb_root, old_log, unchanged_abs_paths, tag)
 
-    for rel_path, sha in current_map.items():
-        prev_sha = old_log.get(rel_path)
-        if prev_sha is not None and prev_sha == sha:
-            # unchanged file; mark this *new* copy for deletion
-            abs_path = os.path.join(portodb_root, rel_path)
-            unchanged_abs_paths.append(abs_path)
-
-        # update log with current hash
-        new_log[rel_path] = sha
+    # 3. Carry forward any existing entries, updated with current hash and stat
+    new_log = dict(old_log)
+    new_log.update(current_map)
 
     # 4. Save updated log
-    save_portodb_log(log_path, new_log)
+    save_portodb_log(log_path, new_log, tag)
 
     # 5. Generate per-run delete script for unchanged files
     if unchanged_abs_paths:
-        print(f"[INFO] {len(unchanged_abs_paths)} PortoDB files unchanged since last export.")
-    generate_portodb_delete_script(unchanged_abs_paths)
+        log(f"[INFO] {len(unchanged_abs_paths)} PortoDB files unchanged since last export.", tag)
+    generate_portodb_delete_script(unchanged_abs_paths, serial)
 
 
 # ----------------- PORTODB BACKUP ----------------- #
 
-def backup_portodb_dbs(adb_path: str, portodb_dir: Optional[str], run_dir: str, backup_root: str) -> None:
+def backup_portodb_dbs(
+    adb_path: str,
+    portodb_dir: Optional[str],
+    dest_parent_wsl: str,
+    dest_parent_win: str,
+    backup_root: str,
+    serial: Optional[str] = None
+) -> None:
     """
     Back up PortoDB SQLite databases from the phone using adb.
 
@@ -474,37 +1613,120 @@ def backup_portodb_dbs(adb_path: str, portodb_dir: Optional[str], run_dir: str,
       - generate SHA256.txt for all files under <run_dir>/portodb
       - maintain a running SHA log under BACKUP_ROOT
       - create a per-run delete script for unchanged destination files
+
+    dest_parent_wsl/_win (<run_dir>/portodb) come from prepare_run_layout().
     """
+    tag = log_tag("portodb", serial)
     if not portodb_dir:
-        print("[INFO] PORTODB_DB_DIR not set; skipping PortoDB backup.")
+        log("[INFO] PORTODB_DB_DIR not set; skipping PortoDB backup.", tag)
         return
 
     phone_dir = portodb_dir.rstrip("/")
-    dest_parent_wsl = os.path.join(run_dir, "portodb")
-    os.makedirs(dest_parent_wsl, exist_ok=True)
-
-    try:
-        dest_parent_win = wsl_to_win_path(dest_parent_wsl)
-    except ValueError as e:
-        print(f"[PATH CONVERT FAIL] {e}")
-        return
-
-    print(f"[STEP] Backing up PortoDB SQLite DBs from {phone_dir} ...")
-    result = run_adb(adb_path, ["pull", phone_dir, dest_parent_win])
+    log(f"[STEP] Backing up PortoDB SQLite DBs from {phone_dir} ...", tag)
+    # -a keeps device mtimes so the size/mtime SHA cache can match across runs
+    result = run_adb_stream(adb_path, ["pull", "-a", phone_dir, dest_parent_win], serial=serial, tag=tag)
     if result.returncode != 0:
-        print("[WARN] PortoDB backup may have failed:")
-        print(result.stderr.strip())
+        log(f"[WARN] PortoDB backup may have failed:\n{result.stderr.strip()}", tag)
         # If backup failed, don't try to hash/dedupe
         return
 
-    print(f"[OK] PortoDB DBs backed up under {dest_parent_wsl}")
+    log(f"[OK] PortoDB DBs backed up under {dest_parent_wsl}", tag)
 
     # Now run SHA256 + dedupe logic on the backed-up tree
-    process_portodb_hashes_and_dedupe(dest_parent_wsl, backup_root)
+    process_portodb_hashes_and_dedupe(dest_parent_wsl, backup_root, serial)
 
 
 # ----------------- MAIN ----------------- #
 
+def backup_device(
+    cfg: Mapping[str, Any],
+    dest_root: str,
+    run_start: datetime,
+    skip_portodb: bool,
+    jobs: Optional[int] = None,
+    serial: Optional[str] = None
+) -> str:
+    """
+    Run every backup step for one device into
+    <dest_root>/YYYY/MM/DD/HHMM and return that run dir. dest_root is
+    BACKUP_ROOT itself for a lone device, or BACKUP_ROOT/<serial> when
+    several are backed up at once. `jobs` (from --jobs) overrides both
+    BACKUP_PARALLELISM and DOWNLOAD_PARALLELISM. Every adb call targets
+    `serial`, so an unauthorized or offline device listed next to it
+    doesn't make adb refuse with "more than one device".
+    """
+    adb_path = cfg["ADB_PATH"]
+    phone_capcut_dir = cfg["PHONE_CAPCUT_DIR"]
+    media_dirs = cfg["PHONE_MEDIA_DIRS"]
+    portodb_dir = cfg["PORTODB_DB_DIR"]
+    download_ignore_patterns = cfg["DOWNLOAD_IGNORE_PATTERNS"]
+    parallelism = jobs or cfg["BACKUP_PARALLELISM"]
+    download_parallelism = jobs or cfg["DOWNLOAD_PARALLELISM"]
+    incremental = cfg["INCREMENTAL_BACKUP"]
+    use_tar_stream = cfg["USE_TAR_STREAM"]
+    use_adb_forward = cfg["USE_ADB_FORWARD"]
+    tag = log_tag(serial=serial)
+
+    # One shell session serves every adb_shell() call for this device
+    with AdbSession(adb_path, serial):
+        run_dir = create_run_directory(dest_root, run_start, tag)
+        prev_run_dir = find_previous_run_dir(dest_root, run_dir) if incremental else None
+        if incremental:
+            log(f"[INFO] Incremental backup against previous run: {prev_run_dir or '(none)'}", tag)
+
+        # Create every destination up front, so the concurrent steps below
+        # never race on makedirs and path conversion fails before any pull.
+        subdirs: List[str] = []
+        # subdirs.append("capcut_app")  # CapCut external data (optional)
+        if media_dirs:
+            subdirs.append("media")
+        if portodb_dir and not skip_portodb:
+            subdirs.append("portodb")
+        layout = prepare_run_layout(run_dir, subdirs, adb_path)
+
+        # The top-level steps pull disjoint phone dirs into disjoint run_dir
+        # subfolders, so they can share the adb server concurrently.
+        steps = {}
+
+        # CapCut external data (optional)
+        # steps["capcut"] = (backup_capcut_data, (adb_path, phone_capcut_dir, *layout["capcut_app"], serial))
+
+        # Media backup
+        if media_dirs:
+            steps["media"] = (backup_media_dirs, (
+                adb_path, media_dirs, run_dir, *layout["media"], download_ignore_patterns,
+                parallelism, incremental, prev_run_dir, use_tar_stream, use_adb_forward,
+                download_parallelism, serial,
+            ))
+        else:
+            log("[INFO] No PHONE_MEDIA_DIRS specified; skipping media backup.", tag)
+
+        # PortoDB (optional, controlled by CLI + env)
+        if skip_portodb:
+            log("[INFO] --skip-portodb flag enabled; skipping PortoDB backup.", tag)
+        elif not portodb_dir:
+            log("[INFO] PORTODB_DB_DIR not set; skipping PortoDB backup.", tag)
+        else:
+            steps["portodb"] = (backup_portodb_dbs, (
+                adb_path, portodb_dir, *layout["portodb"], dest_root, serial,
+            ))
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(steps), parallelism))) as executor:
+            futures = {name: executor.submit(fn, *fn_args) for name, (fn, fn_args) in steps.items()}
+            for future in as_completed(futures.values()):
+                future.result()  # re-raise anything a step raised (e.g. SystemExit)
+
+        # Delete script (for media only, on the phone). The media step already
+        # collected every path it backed up, so the phone isn't walked twice.
+        if media_dirs:
+            log("[STEP] Building delete script from backed-up media...", tag)
+            generate_delete_script(futures["media"].result(), run_start, serial)
+        else:
+            log("[INFO] No media dirs configured; skipping delete script generation.", tag)
+
+    return run_dir
+
+
 def main():
     # CLI args
     parser = argparse.ArgumentParser(description="Android media + CapCut + PortoDB backup script")
@@ -513,50 +1735,55 @@ def main():
         action="store_true",
         help="Skip backing up PortoDB SQLite databases"
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        metavar="N",
+        help="Max concurrent adb transfers per device (overrides BACKUP_PARALLELISM and DOWNLOAD_PARALLELISM)"
+    )
     args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
 
     cfg = load_config()
     adb_path = cfg["ADB_PATH"]
     backup_root = cfg["BACKUP_ROOT"]
-    phone_capcut_dir = cfg["PHONE_CAPCUT_DIR"]
-    media_dirs = cfg["PHONE_MEDIA_DIRS"]
-    portodb_dir = cfg["PORTODB_DB_DIR"]
-    download_ignore_patterns = cfg["DOWNLOAD_IGNORE_PATTERNS"]
-
-    print("[CHECK] adb devices")
-    devices = run_adb(adb_path, ["devices"]).stdout
-    print(devices.strip())
-    # don't bail hard if no device line format is weird; just warn
-    if not any(line.strip().endswith("device") for line in devices.splitlines()[1:]):
-        print("[WARN] No connected/authorized device detected. Make sure USB debugging is on and allowed.")
 
-    run_dir = create_run_directory(backup_root)
-
-    # CapCut external data (optional)
-    # backup_capcut_data(adb_path, phone_capcut_dir, run_dir)
-
-    # Media backup
-    if media_dirs:
-        backup_media_dirs(adb_path, media_dirs, run_dir, download_ignore_patterns)
-    else:
-        print("[INFO] No PHONE_MEDIA_DIRS specified; skipping media backup.")
+    log("[CHECK] adb devices")
+    serials = list_authorized_devices(adb_path)
+    if not serials:
+        # Bail before creating an empty run dir
+        raise SystemExit(
+            "[ERROR] No connected/authorized device detected. Make sure USB debugging is on and allowed."
+        )
 
-    # PortoDB (optional, controlled by CLI + env)
-    if not args.skip_portodb:
-        backup_portodb_dbs(adb_path, portodb_dir, run_dir, backup_root)
-    else:
-        print("[INFO] --skip-portodb flag enabled; skipping PortoDB backup.")
+    # One timestamp for the whole run: run dir and delete script names match
+    run_start = datetime.now()
 
-    # Delete script (for media only, on the phone)
-    if media_dirs:
-        print("[STEP] Collecting media file list for delete script...")
-        media_files = list_media_files_for_delete(adb_path, media_dirs)
-        generate_delete_script(media_files)
-    else:
-        print("[INFO] No media dirs configured; skipping delete script generation.")
+    if len(serials) == 1:
+        run_dir = backup_device(cfg, backup_root, run_start, args.skip_portodb, args.jobs, serials[0])
+        log(f"[DONE] Backup complete.\n       Run directory: {run_dir}")
+        return
 
-    print("[DONE] Backup complete.")
-    print("       Run directory:", run_dir)
+    # Several phones: back them up side by side, each under
+    # <backup_root>/<serial>/ so their runs, manifests and logs stay apart.
+    # The work is USB/IO-bound, so more threads than cores is fine.
+    log(f"[INFO] {len(serials)} devices attached; backing up each under {backup_root}/<serial>/")
+    _MULTI_DEVICE_SERIALS.update(serials)
+    workers = min(len(serials), (os.cpu_count() or 1) * 2)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                backup_device, cfg, os.path.join(backup_root, device_dir_name(serial)),
+                run_start, args.skip_portodb, args.jobs, serial,
+            ): serial
+            for serial in serials
+        }
+        run_dirs = {futures[future]: future.result() for future in as_completed(futures)}
+
+    log("[DONE] Backup complete.")
+    for serial in serials:
+        log(f"       Run directory ({serial}): {run_dirs[serial]}")
 
 
 if __name__ == "__main__":
@@ -1,28 +1,57 @@
 #!/usr/bin/env python3
 import os
 import subprocess
-from typing import List
+import argparse
+import functools
+import hashlib
+import re
+import shlex
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 from dotenv import load_dotenv
 
 
+_WSL_RE = re.compile(r"^/mnt/([a-zA-Z])(?:/(.*))?$")
+
+
+@functools.lru_cache(maxsize=4096)
 def wsl_to_win_path(wsl_path: str) -> str:
     """
     Convert a WSL path like /mnt/c/Users/rtackett/Documents/CapCutBackups
     to a Windows path like C:\\Users\\rtackett\\Documents\\CapCutBackups.
     """
-    wsl_path = os.path.normpath(wsl_path)
-    if not wsl_path.startswith("/mnt/"):
+    m = _WSL_RE.match(wsl_path.rstrip("/"))
+    if not m:
         raise ValueError(f"Cannot convert non-/mnt path to Windows path: {wsl_path}")
+    return f"{m.group(1).upper()}:\\" + (m.group(2) or "").replace("/", "\\")
+
+
+# adb binaries that run inside WSL (ADB_PATH_LINUX); filled by load_config()
+_NATIVE_ADB_PATHS: Set[str] = set()
+
+
+def adb_local_path(adb_path: str, local_path: str) -> str:
+    """
+    Path to hand adb for a local file or dir: the Windows form for adb.exe,
+    the WSL path as-is for a Linux adb (ADB_PATH_LINUX).
+    """
+    if adb_path in _NATIVE_ADB_PATHS:
+        return local_path
+    return wsl_to_win_path(local_path)
+
 
-    parts = wsl_path.split("/")
-    # ['', 'mnt', 'c', 'Users', 'rtackett', 'Documents', 'CapCutBackups', ...]
-    if len(parts) < 4:
-        raise ValueError(f"Unexpected WSL path format: {wsl_path}")
+# Pushes run on a thread pool; print() writes the text and the newline
+# separately, so concurrent lines go through log() to stay whole.
+_PRINT_LOCK = threading.Lock()
 
-    drive_letter = parts[2].upper()  # 'c' -> 'C'
-    rest = parts[3:]                 # ['Users','rtackett',...]
-    return drive_letter + ":\\" + "\\".join(rest)
+
+def log(msg: str) -> None:
+    with _PRINT_LOCK:
+        print(msg, flush=True)
 
 
 # ----------------- ENV LOADING ----------------- #
@@ -30,129 +59,558 @@ def wsl_to_win_path(wsl_path: str) -> str:
 def load_config():
     load_dotenv()
 
-    adb_path = os.getenv("ADB_PATH_WSL")
+    # A Linux adb, when configured, wins over adb.exe (see adb_local_path)
+    adb_path_linux = os.getenv("ADB_PATH_LINUX", "").strip()
+    if adb_path_linux:
+        _NATIVE_ADB_PATHS.add(adb_path_linux)
+    adb_path = adb_path_linux or os.getenv("ADB_PATH_WSL")
     backup_root = os.getenv("BACKUP_ROOT_WSL")
     media_dirs_raw = os.getenv("PHONE_MEDIA_DIRS", "")
+    parallelism_raw = os.getenv("RESTORE_PARALLELISM", "4").strip()
+    # On by default; RESTORE_SYNC=0 forces every file to be re-sent
+    restore_sync = os.getenv("RESTORE_SYNC", "1").strip().lower() in ("1", "true", "yes")
 
     if not adb_path:
-        raise SystemExit("[ERROR] ADB_PATH_WSL not set in .env")
+        raise SystemExit("[ERROR] ADB_PATH_WSL (or ADB_PATH_LINUX) not set in .env")
     if not backup_root:
         raise SystemExit("[ERROR] BACKUP_ROOT_WSL not set in .env")
+    try:
+        parallelism = max(1, int(parallelism_raw))
+    except ValueError:
+        raise SystemExit(f"[ERROR] RESTORE_PARALLELISM must be an integer, got {parallelism_raw!r}")
 
-    media_dirs = [m.strip() for m in media_dirs_raw.split(",") if m.strip()]
+    # No trailing "/", no empty entries
+    media_dirs = [d for d in (m.strip().rstrip("/") for m in media_dirs_raw.split(",")) if d]
 
     return {
         "ADB_PATH": adb_path,
         "BACKUP_ROOT": backup_root,
         "PHONE_MEDIA_DIRS": media_dirs,
+        "RESTORE_PARALLELISM": parallelism,
+        "RESTORE_SYNC": restore_sync,
     }
 
 
 # ----------------- ADB HELPERS ----------------- #
 
-def run_adb(adb_path: str, args: List[str], check: bool = False) -> subprocess.CompletedProcess:
-    cmd = [adb_path] + args
+def adb_cmd(adb_path: str, serial: Optional[str] = None) -> List[str]:
+    """adb argv prefix, pinned to `serial` once main() has picked the device."""
+    return [adb_path, "-s", serial] if serial else [adb_path]
+
+
+def run_adb(
+    adb_path: str,
+    args: List[str],
+    check: bool = False,
+    serial: Optional[str] = None
+) -> subprocess.CompletedProcess:
+    cmd = adb_cmd(adb_path, serial) + args
     try:
-        return subprocess.run(cmd, capture_output=True, text=True, check=check)
+        # Give adb.exe no stdin at all rather than the terminal
+        return subprocess.run(cmd, capture_output=True, text=True, check=check, stdin=subprocess.DEVNULL)
     except FileNotFoundError:
         raise SystemExit(
             f"[ERROR] adb executable not found at {adb_path}\n"
-            "Check ADB_PATH_WSL in your .env."
+            "Check ADB_PATH_WSL (or ADB_PATH_LINUX) in your .env."
         )
 
 
+def run_adb_stream(
+    adb_path: str,
+    args: List[str],
+    serial: Optional[str] = None
+) -> subprocess.CompletedProcess:
+    """
+    Like run_adb(), for long pushes: adb's stdout is echoed line by line as
+    it arrives instead of being buffered whole; stderr comes back as .stderr.
+    """
+    cmd = adb_cmd(adb_path, serial) + args
+    with tempfile.TemporaryFile() as err:
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=err,
+                text=True,
+                errors="replace",
+                bufsize=1,
+            )
+        except FileNotFoundError:
+            raise SystemExit(
+                f"[ERROR] adb executable not found at {adb_path}\n"
+                "Check ADB_PATH_WSL (or ADB_PATH_LINUX) in your .env."
+            )
+        with proc.stdout:
+            for line in proc.stdout:
+                if line.strip():
+                    log(f"    {line.rstrip()}")
+        returncode = proc.wait()
+        err.seek(0)
+        stderr = err.read().decode("utf-8", "replace")
+    return subprocess.CompletedProcess(cmd, returncode, "", stderr)
+
+
+def list_authorized_devices(adb_path: str) -> List[str]:
+    """
+    Parse `adb devices` and return the serials whose state is "device",
+    skipping unauthorized/offline entries and any daemon startup chatter.
+    """
+    devices = run_adb(adb_path, ["devices"]).stdout
+    print(devices.strip())
+    authorized: List[str] = []
+    for line in devices.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) >= 2 and fields[1] == "device":
+            authorized.append(fields[0])
+    return authorized
+
+
+@functools.lru_cache(maxsize=None)
+def device_has_tar(adb_path: str, serial: Optional[str] = None) -> bool:
+    """
+    True if the device shell has a `tar` (toybox ships one on modern
+    Android). Checked once per device.
+    """
+    result = run_adb(adb_path, ["shell", "command -v tar 2>/dev/null"], serial=serial)
+    return result.returncode == 0 and bool(result.stdout.strip())
+
+
 # ----------------- RESTORE LOGIC ----------------- #
 
+# Dirs whose sampled average file size is below this go over as one tar
+# stream: for small files adb push's per-file round-trips dominate, while
+# big media is fastest through plain adb push.
+TAR_PUSH_MAX_AVG_SIZE = 256 * 1024
+TAR_PUSH_SAMPLE_FILES = 200
+
+
+def mostly_small_files(local_dir: str) -> bool:
+    """
+    Sample up to TAR_PUSH_SAMPLE_FILES files under local_dir and report
+    whether their average size is below TAR_PUSH_MAX_AVG_SIZE.
+    """
+    count = total = 0
+    stack = [local_dir]
+    while stack and count < TAR_PUSH_SAMPLE_FILES:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    count += 1
+                    total += entry.stat(follow_symlinks=False).st_size
+                    if count >= TAR_PUSH_SAMPLE_FILES:
+                        break
+    return count > 0 and total / count < TAR_PUSH_MAX_AVG_SIZE
+
+
+def push_tar(
+    adb_path: str,
+    local_dir_wsl: str,
+    dest_parent: str,
+    serial: Optional[str] = None
+) -> subprocess.CompletedProcess:
+    """
+    Restore local_dir_wsl into dest_parent as one stream:
+        tar -C <parent> -cf - <Name> | adb shell -T "tar -C <dest_parent> -xf -"
+    instead of adb push's SEND/DATA/DONE round-trip per file. The local tar
+    runs in WSL and reads the WSL path directly. Non-zero if either side fails.
+
+    shell -T (no pty) uses the shell protocol, which carries stdin and the
+    device exit status; exec-in would return neither output nor status.
+    """
+    tar_cmd = ["tar", "-C", os.path.dirname(local_dir_wsl), "-cf", "-", os.path.basename(local_dir_wsl)]
+    adb_args = ["shell", "-T", f"tar -C {shlex.quote(dest_parent)} -xf -"]
+    tar_p = subprocess.Popen(tar_cmd, stdout=subprocess.PIPE)
+    try:
+        result = subprocess.run(
+            adb_cmd(adb_path, serial) + adb_args, stdin=tar_p.stdout, capture_output=True, text=True
+        )
+    except FileNotFoundError:
+        tar_p.kill()
+        raise SystemExit(
+            f"[ERROR] adb executable not found at {adb_path}\n"
+            "Check ADB_PATH_WSL (or ADB_PATH_LINUX) in your .env."
+        )
+    finally:
+        tar_p.stdout.close()
+    if tar_p.wait() != 0 and result.returncode == 0:
+        result.returncode = tar_p.returncode
+        result.stderr = f"local tar exited with status {tar_p.returncode}"
+    return result
+
+
+# Run dirs sit at <backup_root>/YYYY/MM/DD/HHMM (or one level lower, under
+# <backup_root>/<serial>/, for multi-device backups)
+_RUN_LEVELS = (
+    re.compile(r"^[0-9]{4}$"),
+    re.compile(r"^[0-9]{2}$"),
+    re.compile(r"^[0-9]{2}$"),
+    re.compile(r"^[0-9]{4}$"),
+)
+
+
+def _subdirs(path: str) -> List[os.DirEntry]:
+    try:
+        with os.scandir(path) as it:
+            return [e for e in it if e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return []
+
+
+def _runs_under(base: str) -> List[str]:
+    level = [base]
+    for pattern in _RUN_LEVELS:
+        level = [e.path for d in level for e in _subdirs(d) if pattern.match(e.name)]
+    return [d for d in level if os.path.isdir(os.path.join(d, "media"))]
+
+
 def find_backup_runs(backup_root: str) -> List[str]:
     """
-    Recursively find run directories that contain a 'media' folder.
+    Find run directories that contain a 'media' folder.
     Returns a sorted list of paths.
+
+    Only the known YYYY/MM/DD/HHMM levels are scanned (plus a leading
+    <serial> level for multi-device backups), so neither the backed-up
+    files nor unrelated folders are ever walked.
     """
     run_dirs = []
     if not os.path.isdir(backup_root):
         print("[WARN] BACKUP_ROOT_WSL does not exist yet:", backup_root)
         return run_dirs
 
-    for root, dirs, files in os.walk(backup_root):
-        if "media" in dirs:
-            run_dirs.append(os.path.join(root))  # root is the run dir
-    run_dirs = sorted(set(run_dirs))
+    run_dirs.extend(_runs_under(backup_root))
+    for entry in _subdirs(backup_root):
+        if not _RUN_LEVELS[0].match(entry.name):
+            run_dirs.extend(_runs_under(entry.path))
+    run_dirs = sorted(run_dirs)
     return run_dirs
 
 
+def choose_device(serials: List[str]) -> str:
+    if len(serials) == 1:
+        return serials[0]
+
+    print("Several devices are attached:")
+    for i, serial in enumerate(serials):
+        print(f"  [{i}] {serial}")
+
+    while True:
+        choice = input("Enter the index of the device to restore to: ")
+        try:
+            idx = int(choice)
+            if 0 <= idx < len(serials):
+                return serials[idx]
+        except ValueError:
+            pass
+        print("Invalid choice. Try again.")
+
+
 def choose_run_dir(run_dirs: List[str]) -> str:
     if not run_dirs:
         raise SystemExit("[ERROR] No backup runs found with a 'media' folder.")
 
-    print("Available backup runs:")
-    for i, path in enumerate(run_dirs):
-        print(f"  [{i}] {path}")
+    # One write for the whole listing; years of runs can mean hundreds of lines
+    print("\n".join(
+        ["Available backup runs:"] + [f"  [{i}] {path}" for i, path in enumerate(run_dirs)]
+    ))
 
+    count = len(run_dirs)
     while True:
         choice = input("Enter the index of the run you want to restore from: ")
         try:
             idx = int(choice)
-            if 0 <= idx < len(run_dirs):
+            if 0 <= idx < count:
                 return run_dirs[idx]
         except ValueError:
             pass
         print("Invalid choice. Try again.")
 
 
-def restore_media_dirs(adb_path: str, media_dirs: List[str], run_dir: str):
+# One planned media restore: (phone_dir, local_dir_wsl, local_dir_for_adb,
+# dest_parent), e.g. /sdcard/DCIM/Camera, <run_dir>/media/Camera, its
+# Windows form for adb.exe, /sdcard/DCIM
+MediaPush = Tuple[str, str, str, str]
+
+
+def plan_media_restore(
+    adb_path: str,
+    media_dirs: List[str],
+    media_parent_wsl: str
+) -> Dict[str, List[MediaPush]]:
+    """
+    Work out every push up front, before any adb call: which configured dirs
+    were backed up (one scandir of media/ rather than an isdir each), their
+    adb-side source paths, and where they go. Returns dest_parent -> pushes
+    into it, in config order.
+    """
+    with os.scandir(media_parent_wsl) as it:
+        present = {e.name for e in it if e.is_dir(follow_symlinks=False)}
+
+    groups: Dict[str, List[MediaPush]] = defaultdict(list)
+    for phone_dir in media_dirs:
+        name = os.path.basename(phone_dir)  # e.g. Camera, Pictures, Movies, Download
+        local_dir_wsl = os.path.join(media_parent_wsl, name)
+        if name not in present:
+            log(f"[SKIP] Local media dir not found for {phone_dir}: {local_dir_wsl}")
+            continue
+        try:
+            local_dir_win = adb_local_path(adb_path, local_dir_wsl)
+        except ValueError as e:
+            log(f"[PATH CONVERT FAIL] {e}")
+            continue
+        dest_parent = phone_dir.rsplit("/", 1)[0]  # e.g. /sdcard/DCIM
+        groups[dest_parent].append((phone_dir, local_dir_wsl, local_dir_win, dest_parent))
+    return groups
+
+
+def push_media_dir(
+    adb_path: str,
+    push: MediaPush,
+    sync: bool = True,
+    serial: Optional[str] = None
+) -> None:
+    """
+    Push one planned media dir back, e.g. media/Camera -> /sdcard/DCIM/.
+    Messages go through log(), as several of these run at once.
+
+    With `sync`, big-file dirs use `adb push --sync`, which skips files the
+    phone already has at the same size and mtime (e.g. when re-running a
+    restore that failed halfway).
+    """
+    phone_dir, local_dir_wsl, local_dir_win, dest_parent = push
+    name = os.path.basename(local_dir_wsl)
+
+    if mostly_small_files(local_dir_wsl) and device_has_tar(adb_path, serial):
+        log(f"[STEP] Restoring media {name} to {dest_parent} (tar stream) ...")
+        result = push_tar(adb_path, local_dir_wsl, dest_parent, serial)
+        if result.returncode == 0:
+            log(f"[OK] Media restored for {phone_dir}")
+            return
+        log(f"[WARN] tar stream restore of {phone_dir} failed ({result.stderr.strip()}); using adb push.")
+
+    log(f"[STEP] Restoring media {name} to {dest_parent} ...")
+    # adb push [--sync] <local_dir_win> <dest_parent>
+    push_args = ["push", "--sync"] if sync else ["push"]
+    result = run_adb_stream(adb_path, push_args + [local_dir_win, dest_parent], serial)
+    if result.returncode != 0:
+        log(f"[WARN] Restore of media {phone_dir} may have failed:\n{result.stderr.strip()}")
+    else:
+        log(f"[OK] Media restored for {phone_dir}")
+
+
+def push_media_group(
+    adb_path: str,
+    pushes: List[MediaPush],
+    sync: bool = True,
+    serial: Optional[str] = None
+) -> None:
+    """Push dirs that share a destination one after another (see push_media_dir)."""
+    for push in pushes:
+        push_media_dir(adb_path, push, sync, serial)
+
+
+# ----------------- RESTORE VERIFY ----------------- #
+
+def iter_local_files(root: str) -> Iterator[str]:
+    """Yield the path of every regular file under root (symlinks not followed)."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path
+
+
+def compute_sha1(path: str) -> str:
+    """
+    SHA-1 of a local file, matching the device's `sha1sum`. Only used to
+    spot corrupt or missing copies, hence usedforsecurity=False.
+    """
+    try:
+        h = hashlib.new("sha1", usedforsecurity=False)
+    except TypeError:  # Python < 3.9
+        h = hashlib.sha1()
+    buf = bytearray(1024 * 1024)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def hash_local_tree(
+    executor: ThreadPoolExecutor,
+    phone_dir: str,
+    local_dir_wsl: str
+) -> Dict[str, "Future[str]"]:
+    """
+    Walk one backed-up tree and queue a SHA-1 of each file on `executor`,
+    keyed by the phone path it will land on.
+    """
+    futures: Dict[str, "Future[str]"] = {}
+    for path in iter_local_files(local_dir_wsl):
+        rel = os.path.relpath(path, local_dir_wsl).replace(os.sep, "/")
+        futures[f"{phone_dir}/{rel}"] = executor.submit(compute_sha1, path)
+    return futures
+
+
+def start_local_hashes(
+    executor: ThreadPoolExecutor,
+    groups: Dict[str, List[MediaPush]]
+) -> List["Future[Dict[str, Future[str]]]"]:
+    """
+    Hash every file about to be restored, one walk task per tree, so both
+    the walk over /mnt/c and the hashing run on `executor` while the
+    USB-bound pushes do (hashlib releases the GIL, so threads use the idle
+    cores). Returns immediately; see hash_local_tree for each result.
+    """
+    return [
+        executor.submit(hash_local_tree, executor, phone_dir, local_dir_wsl)
+        for pushes in groups.values()
+        for phone_dir, local_dir_wsl, _, _ in pushes
+    ]
+
+
+def verify_media_restore(
+    adb_path: str,
+    groups: Dict[str, List[MediaPush]],
+    local_trees: List["Future[Dict[str, Future[str]]]"],
+    serial: Optional[str] = None
+) -> bool:
+    """
+    Hash every restored dir on the device with one `adb shell` round-trip
+    (`find <dir> -type f -exec sha1sum {} +` per dir) and compare against
+    the local hashes from start_local_hashes. Files the phone has beyond
+    the backup are ignored.
+    Returns True when every backed-up file is on the phone, intact.
+    """
+    phone_dirs = [push[0] for pushes in groups.values() for push in pushes]
+    if not phone_dirs:
+        return True
+
+    local_hashes: Dict[str, "Future[str]"] = {}
+    for tree in local_trees:
+        local_hashes.update(tree.result())
+
+    print(f"[VERIFY] Hashing {len(local_hashes)} restored files on the device ...")
+    cmd = "; ".join(
+        f"find {shlex.quote(d)} -type f -exec sha1sum {{}} + 2>/dev/null" for d in phone_dirs
+    )
+    result = run_adb(adb_path, ["shell", cmd], serial=serial)
+    device_hashes: Dict[str, str] = {}
+    for line in result.stdout.splitlines():
+        # "<40 hex>  <path>"
+        line = line.rstrip("\r")
+        if len(line) > 42 and line[40:42] == "  ":
+            device_hashes[line[42:]] = line[:40]
+
+    missing: List[str] = []
+    mismatched: List[str] = []
+    for phone_path, future in local_hashes.items():
+        device_sha = device_hashes.get(phone_path)
+        if device_sha is None:
+            missing.append(phone_path)
+        elif device_sha != future.result():
+            mismatched.append(phone_path)
+
+    for phone_path in missing:
+        print(f"[VERIFY FAIL] Missing on phone: {phone_path}")
+    for phone_path in mismatched:
+        print(f"[VERIFY FAIL] Contents differ: {phone_path}")
+    if missing or mismatched:
+        print(f"[WARN] {len(missing)} missing and {len(mismatched)} differing of {len(local_hashes)} files.")
+        return False
+    print(f"[OK] All {len(local_hashes)} restored files match the backup.")
+    return True
+
+
+def restore_media_dirs(
+    adb_path: str,
+    media_dirs: List[str],
+    run_dir: str,
+    parallelism: int = 4,
+    sync: bool = True,
+    serial: Optional[str] = None,
+    verify: bool = False
+):
     """
     For each e.g. /sdcard/DCIM/Camera, we backed up into:
       <run_dir>/media/Camera/...
 
     We now push Camera back into /sdcard/DCIM/, Pictures into /sdcard/, etc.
+    Dirs are grouped by that destination parent (see plan_media_restore):
+    each group is pushed in order, and up to `parallelism` groups run at
+    once. So there is at most one write stream per destination, rather than
+    several pushes making the phone's flash interleave writes into the same
+    place.
+
+    With `verify`, the local side is hashed during the pushes and compared
+    afterwards against one device-side sha1sum pass (see
+    verify_media_restore).
     """
     media_parent_wsl = os.path.join(run_dir, "media")
     if not os.path.isdir(media_parent_wsl):
         print("[INFO] No 'media' folder in this run; skipping media restore.")
         return
 
-    for phone_dir in media_dirs:
-        phone_dir = phone_dir.rstrip("/")
-        name = os.path.basename(phone_dir)  # e.g. Camera, Pictures, Movies, Download
-        local_dir_wsl = os.path.join(media_parent_wsl, name)
+    groups = plan_media_restore(adb_path, media_dirs, media_parent_wsl)
 
-        if not os.path.isdir(local_dir_wsl):
-            print(f"[SKIP] Local media dir not found for {phone_dir}: {local_dir_wsl}")
-            continue
+    # Threads start lazily, so the hash pool costs nothing without `verify`
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as hash_executor:
+        local_trees = start_local_hashes(hash_executor, groups) if verify else []
 
-        try:
-            local_dir_win = wsl_to_win_path(local_dir_wsl)
-        except ValueError as e:
-            print(f"[PATH CONVERT FAIL] {e}")
-            continue
+        with ThreadPoolExecutor(max_workers=max(1, min(len(groups), parallelism))) as executor:
+            futures = [
+                executor.submit(push_media_group, adb_path, pushes, sync, serial)
+                for pushes in groups.values()
+            ]
+            for future in as_completed(futures):
+                future.result()
 
-        dest_parent = phone_dir.rsplit("/", 1)[0]  # e.g. /sdcard/DCIM
-        print(f"[STEP] Restoring media {name} to {dest_parent} ...")
-        # adb push <local_dir_win> <dest_parent>
-        result = run_adb(adb_path, ["push", local_dir_win, dest_parent])
-        if result.returncode != 0:
-            print(f"[WARN] Restore of media {phone_dir} may have failed:")
-            print(result.stderr.strip())
-        else:
-            print(f"[OK] Media restored for {phone_dir}")
+        if verify:
+            verify_media_restore(adb_path, groups, local_trees, serial)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Restore backed-up Android media to the phone")
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="After restoring, compare SHA-1 of every restored file against the phone's copy"
+    )
+    args = parser.parse_args()
+
     cfg = load_config()
     adb_path = cfg["ADB_PATH"]
     backup_root = cfg["BACKUP_ROOT"]
     media_dirs = cfg["PHONE_MEDIA_DIRS"]
+    parallelism = cfg["RESTORE_PARALLELISM"]
+    restore_sync = cfg["RESTORE_SYNC"]
 
+    # Resolve the device once; every adb call below is pinned to it with -s,
+    # so none of them renegotiates (or guesses) which phone to talk to
     print("[CHECK] adb devices")
-    devices = run_adb(adb_path, ["devices"]).stdout
-    print(devices.strip())
+    serials = list_authorized_devices(adb_path)
+    if not serials:
+        raise SystemExit(
+            "[ERROR] No connected/authorized device detected. Make sure USB debugging is on and allowed."
+        )
+    serial = choose_device(serials)
+    print("[INFO] Restoring to device:", serial)
 
     run_dirs = find_backup_runs(backup_root)
     run_dir = choose_run_dir(run_dirs)
     print("[INFO] Using backup run:", run_dir)
 
     if media_dirs:
-        restore_media_dirs(adb_path, media_dirs, run_dir)
+        restore_media_dirs(adb_path, media_dirs, run_dir, parallelism, restore_sync, serial, args.verify)
     else:
         print("[INFO] No PHONE_MEDIA_DIRS configured; nothing to restore.")
 